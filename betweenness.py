@@ -0,0 +1,195 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Betweenness centrality of the nodes of a network, exact or estimated from
+a sample of pivot (source) nodes as in Brandes and Pich 2007. With k pivots
+drawn without replacement, the normalized betweenness of every node is
+within epsilon of its exact value with probability at least 1-delta when
+k >= R^2 ln(2N/delta) / (2 epsilon^2), R = N/(N-1) bounding the contribution
+of a single source (Hoeffding's inequality with a union bound over the N
+nodes). The accuracy is set once, by a number of pivots or by epsilon and
+delta, and betweenness_centrality is then used like nx.betweenness_centrality.
+With several jobs, the single source accumulations of Brandes' algorithm run
+on blocks of sources over a pool of processes sharing the adjacency lists of
+the graph, and the dependencies of each source are added in the same order as
+networkx so that exact values are identical.
+'''
+
+#library imports
+import sys
+import os
+import math
+import numpy as np
+import networkx as nx
+
+import parallel
+from compact_graph import CompactGraph, as_compact
+
+RANDSEED = 2
+BC_DELTA = 0.1 #default probability that some node is off by more than epsilon
+SOURCE_CHUNKS_PER_JOB = 4 #sources are split in this many blocks per process to balance the load
+SOURCE_BLOCK_VALUES = 2**22 #largest number of dependencies, sources times nodes, sent back at once by a process
+
+_accuracy = {'pivots':None, 'epsilon':None, 'delta':None, 'seed':RANDSEED}
+_jobs = {'jobs':1}
+
+
+def set_accuracy(pivots=None, epsilon=None, delta=BC_DELTA, seed=RANDSEED):
+    '''Sets how betweenness_centrality is computed: from a fixed number of pivots,
+    from as many pivots as needed for the (epsilon, delta) guarantee, or exactly
+    if both are None. Processes forked afterwards use the same setting.'''
+    if pivots is not None and pivots < 1:
+        raise ValueError('The number of pivots must be positive')
+    if epsilon is not None and not (0 < epsilon < 1 and 0 < delta < 1):
+        raise ValueError('Epsilon and delta must be between 0 and 1')
+    _accuracy.update({'pivots':pivots, 'epsilon':epsilon, 'delta':delta, 'seed':seed})
+    return None
+
+def set_jobs(jobs):
+    '''Sets the number of processes betweenness_centrality runs on. Inside
+    a worker process of another pool it runs on one process.'''
+    if jobs < 1:
+        raise ValueError('The number of jobs must be positive')
+    _jobs['jobs'] = jobs
+    return None
+
+def is_approximate():
+    return _accuracy['pivots'] is not None or _accuracy['epsilon'] is not None
+
+def accuracy(N=None):
+    '''describes the accuracy of betweenness_centrality, with the number of pivots used on N nodes if given'''
+    if not is_approximate():
+        return 'exact'
+    if _accuracy['epsilon'] is not None:
+        described = 'epsilon={0};delta={1}'.format(_accuracy['epsilon'], _accuracy['delta'])
+    else:
+        described = 'pivots={0}'.format(_accuracy['pivots'])
+    if N is not None:
+        k = number_of_pivots(N)
+        described += ';pivots_used={0}'.format(k) if k < N else ';exact'
+    return described
+
+def pivots_for_accuracy(N, epsilon, delta=BC_DELTA):
+    '''returns the number of pivots needed to estimate the normalized betweenness of all N nodes within epsilon with probability 1-delta'''
+    if N < 3:
+        return N
+    R = N/float(N-1)
+    return int(math.ceil(R*R*math.log(2.0*N/delta)/(2.0*epsilon*epsilon)))
+
+def number_of_pivots(N):
+    '''returns the number of pivots used on a graph with N nodes, N if betweenness is exact'''
+    if _accuracy['epsilon'] is not None:
+        return min(N, pivots_for_accuracy(N, _accuracy['epsilon'], _accuracy['delta']))
+    if _accuracy['pivots'] is not None:
+        return min(N, _accuracy['pivots'])
+    return N
+
+
+def betweenness_centrality(G, normalized=True, pivots=None, ordered=True):
+    '''Returns a dictionary with the betweenness centrality of each node of G, a
+    networkx graph or a CompactGraph, with the accuracy chosen with set_accuracy, or
+    from the given number of pivots, and over the number of processes chosen with
+    set_jobs. Exact values are those of nx.betweenness_centrality, to the last bit.
+    If ordered is False, exact values of a CompactGraph are found on its CSR arrays
+    without a networkx copy and may differ from networkx in the last bits.'''
+    jobs = _jobs['jobs']
+    N = G.number_of_nodes()
+    k = number_of_pivots(N) if pivots is None else min(N, pivots)
+    if k >= N and (ordered or not isinstance(G, CompactGraph)):
+        H = G.to_networkx() if isinstance(G, CompactGraph) else G
+        if jobs <= 1:
+            return nx.betweenness_centrality(H, normalized=normalized)
+        nodes, indptr, indices = networkx_adjacency(H)
+        sources = range(N)
+    else:
+        C = as_compact(G)
+        nodes = C.nodes
+        indptr, indices = C.adjacency_lists()
+        if k >= N:
+            sources = range(N)
+        else:
+            sources = np.random.RandomState(_accuracy['seed']).choice(N, k, replace=False).tolist()
+    values = parallel_dependencies(indptr, indices, sources, jobs)
+    return dict(zip(nodes, rescale(values, N, len(sources), normalized).tolist()))
+
+def networkx_adjacency(G):
+    '''returns the nodes of a networkx graph and its CSR lists, with the nodes and the
+    neighbours of each node in the order networkx goes through them, so that shortest
+    paths are found and dependencies are summed in the same order'''
+    nodes = G.nodes()
+    index = {n:i for i,n in enumerate(nodes)}
+    indptr = [0]
+    indices = []
+    for n in nodes:
+        indices.extend([index[m] for m in G[n]])
+        indptr.append(len(indices))
+    return nodes, indptr, indices
+
+def parallel_dependencies(indptr, indices, sources, jobs=1):
+    '''Returns the sum over the sources of their dependencies on every node. Blocks
+    of consecutive sources are accumulated on a pool of jobs processes and their
+    dependencies are added in the order of the sources, as networkx does.'''
+    N = len(indptr)-1
+    size = int(math.ceil(len(sources)/float(jobs*SOURCE_CHUNKS_PER_JOB)))
+    size = max(1, min(size, SOURCE_BLOCK_VALUES/max(N,1)))
+    blocks = [(sources[i:i+size],) for i in range(0, len(sources), size)]
+    total = np.zeros(N)
+    for block in parallel.imap_tasks(block_dependencies, blocks, jobs, (indptr, indices)):
+        for row in block:
+            total += row
+    return total
+
+def block_dependencies(adjacency, sources):
+    '''task run by each process: the dependencies of each source of a block, one row per source'''
+    indptr, indices = adjacency
+    return np.array([source_dependencies(indptr, indices, s) for s in sources])
+
+def rescale(values, N, sources, normalized=True):
+    '''scales dependencies summed over some sources of an undirected graph like networkx does,
+    extrapolating them to all N sources'''
+    scale = None
+    if normalized:
+        if N > 2:
+            scale = 1.0/((N-1)*(N-2))
+    else:
+        scale = 1.0/2.0
+    values = np.asarray(values)
+    if scale is None:
+        return values
+    if sources < N:
+        scale = scale*N/sources
+    return values*scale
+
+def source_dependencies(indptr, indices, source):
+    '''Brandes' single source accumulation: counts the shortest paths from the source
+    with a breadth first search, then returns the dependency of the source on every
+    node, summed from the farthest nodes back. Predecessors are the neighbours one
+    step closer to the source.'''
+    N = len(indptr)-1
+    sigma = [0.0]*N
+    distance = [-1]*N
+    sigma[source] = 1.0
+    distance[source] = 0
+    order = [source]
+    i = 0
+    while i < len(order):
+        v = order[i]
+        i += 1
+        d = distance[v]+1
+        for w in indices[indptr[v]:indptr[v+1]]:
+            if distance[w] < 0:
+                distance[w] = d
+                order.append(w)
+            if distance[w] == d:
+                sigma[w] += sigma[v]
+    delta = [0.0]*N
+    for w in reversed(order):
+        d = distance[w]-1
+        coefficient = (1.0+delta[w])/sigma[w]
+        for v in indices[indptr[w]:indptr[w+1]]:
+            if distance[v] == d:
+                delta[v] += sigma[v]*coefficient
+    delta[source] = 0.0
+    return delta
@@ -0,0 +1,75 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Cascading failure simulations: every node carries a load (its betweenness
+or degree) and can hold up to (1 + tolerance) times its initial load. When
+a node fails its load is split equally between its neighbours that are
+still working, and the ones pushed over capacity fail in turn. Cascades
+are propagated wave by wave from the nodes that just failed, so each node
+and edge is only visited when a node next to it fails.
+'''
+
+#library imports
+import sys
+import os
+
+from percolation import percolation_curve
+
+TOLERANCE = 0.2 #capacity of each node as a fraction of its initial load above that load
+
+
+def cascade_failures(indptr, indices, loads, tolerance, triggers):
+    '''Takes the CSR adjacency lists of a graph, the initial load of each node and
+    the nodes attacked, in order. Returns the order in which nodes failed, either
+    attacked or overloaded, and the number of failed nodes once the cascade of
+    each attack has stopped.'''
+    N = len(indptr)-1
+    load = list(loads)
+    capacity = [(1+tolerance)*l for l in loads]
+    working = [True]*N
+    failed = []
+    checkpoints = []
+    for t in triggers:
+        if working[t]:
+            working[t] = False
+            failed.append(t)
+            frontier = [t]
+            while frontier:
+                wave = []
+                for i in frontier:
+                    neighbours = [j for j in indices[indptr[i]:indptr[i+1]] if working[j]]
+                    if not neighbours:
+                        continue
+                    share = load[i]/float(len(neighbours))
+                    for j in neighbours:
+                        if not working[j]:
+                            continue #failed earlier in this wave
+                        load[j] += share
+                        if load[j] > capacity[j]:
+                            working[j] = False
+                            failed.append(j)
+                            wave.append(j)
+                frontier = wave
+        checkpoints.append(len(failed))
+    return failed, checkpoints
+
+def cascade_curve(indptr, indices, loads, tolerance, triggers):
+    '''Returns the relative size of the largest component and the average size
+    of the other components after each attack and the cascade it sets off.'''
+    N = len(indptr)-1
+    failed, checkpoints = cascade_failures(indptr, indices, loads, tolerance, triggers)
+    #the components after each cascade are read off a single percolation pass over the failures
+    lc_all, sc_all = percolation_curve(indptr, indices, failed, min(len(failed), N-1))
+    lc_sizes = [1] #relative size of big component
+    sc_sizes = [1] #avg size of smaller components
+    for c in checkpoints:
+        if c < len(lc_all):
+            lc_sizes.append(lc_all[c])
+            sc_sizes.append(sc_all[c])
+        else:
+            #every node has failed
+            lc_sizes.append(0.0)
+            sc_sizes.append(1.0)
+    return lc_sizes, sc_sizes
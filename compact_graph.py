@@ -0,0 +1,188 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Compact array representation of undirected networks: nodes are
+interned as integers and the adjacency is stored as CSR arrays.
+'''
+
+#library imports
+import sys
+import os
+import numpy as np
+import scipy.sparse
+import scipy.sparse.csgraph
+import networkx as nx
+
+INDEX_TYPE = np.int32
+
+
+class CompactGraph(object):
+    '''Undirected graph stored as a list of node names and CSR arrays: the
+    neighbours of node i are indices[indptr[i]:indptr[i+1]]. Self loops are
+    left out of the CSR arrays, which only hold neighbours other than the node
+    itself, and the nodes with a self loop are listed in loops instead.'''
+
+    def __init__(self, nodes, indptr, indices, loops=None):
+        self.nodes = list(nodes)
+        self.indptr = indptr
+        self.indices = indices
+        self.loops = np.zeros(0, dtype=INDEX_TYPE) if loops is None else np.asarray(loops, dtype=INDEX_TYPE)
+        self.index = {n:i for i,n in enumerate(self.nodes)}
+
+    @classmethod
+    def from_networkx(cls, G):
+        '''builds the compact graph of a networkx graph, keeping the order of G.nodes()'''
+        nodes = G.nodes()
+        index = {n:i for i,n in enumerate(nodes)}
+        sources = []
+        targets = []
+        for s,t in G.edges_iter():
+            sources.append(index[s])
+            targets.append(index[t])
+        return cls.from_edges(nodes, np.array(sources, dtype=INDEX_TYPE), np.array(targets, dtype=INDEX_TYPE))
+
+    @classmethod
+    def from_edges(cls, nodes, sources, targets):
+        '''builds the compact graph from arrays of edge end points given as node indices.
+        Edges from a node to itself are its self loop.'''
+        N = len(nodes)
+        isLoop = sources == targets
+        loops = np.unique(sources[isLoop])
+        sources, targets = sources[~isLoop], targets[~isLoop]
+        rows = np.concatenate((sources, targets))
+        cols = np.concatenate((targets, sources))
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(N+1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=N), out=indptr[1:])
+        return cls(nodes, indptr, cols[order].astype(INDEX_TYPE), loops)
+
+    def to_networkx(self):
+        '''returns the graph as a networkx graph with the original node names'''
+        G = nx.Graph()
+        G.add_nodes_from(self.nodes)
+        sources, targets = self.edge_arrays()
+        G.add_edges_from((self.nodes[s], self.nodes[t]) for s,t in zip(sources.tolist(), targets.tolist()))
+        G.add_edges_from((self.nodes[i], self.nodes[i]) for i in self.loops.tolist())
+        return G
+
+    def number_of_nodes(self):
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        '''returns the number of edges, counting self loops as networkx does'''
+        return len(self.indices)/2 + len(self.loops)
+
+    def number_of_selfloops(self):
+        return len(self.loops)
+
+    def degrees(self, selfloops=False):
+        '''returns the array of the number of neighbours of each node other than
+        itself, or of node degrees as in networkx, where a self loop adds 2, if
+        selfloops is True'''
+        degrees = np.diff(self.indptr)
+        if selfloops and len(self.loops):
+            degrees[self.loops] += 2
+        return degrees
+
+    def neighbours(self, i):
+        '''returns the array of indices of the neighbours of node i'''
+        return self.indices[self.indptr[i]:self.indptr[i+1]]
+
+    def adjacency_lists(self):
+        '''returns the CSR arrays as python lists, which are faster
+        to index one element at a time'''
+        return self.indptr.tolist(), self.indices.tolist()
+
+    def node_indices(self, nodes):
+        '''converts a list of node names to their indices'''
+        return [self.index[n] for n in nodes]
+
+    def edge_arrays(self):
+        '''returns the arrays of end points of each edge other than self loops,
+        listed once with the smaller index first, in CSR order'''
+        sources = np.repeat(np.arange(len(self.nodes), dtype=INDEX_TYPE), self.degrees())
+        upper = sources < self.indices
+        return sources[upper], self.indices[upper]
+
+    def to_sparse(self):
+        '''returns the adjacency matrix as a scipy sparse CSR matrix'''
+        N = len(self.nodes)
+        data = np.ones(len(self.indices), dtype=np.int32)
+        return scipy.sparse.csr_matrix((data, self.indices, self.indptr), shape=(N,N))
+
+    def component_labels(self):
+        '''returns the number of connected components and the label of the component of each node'''
+        return scipy.sparse.csgraph.connected_components(self.to_sparse(), directed=False)
+
+    def components(self):
+        '''returns an array of node indices per connected component, largest first'''
+        count, labels = self.component_labels()
+        members = np.argsort(labels, kind='mergesort')
+        sizes = np.bincount(labels, minlength=count)
+        return sorted(np.split(members, np.cumsum(sizes)[:-1]), key=len, reverse=True)
+
+    def subgraph(self, keep):
+        '''returns the graph induced by the nodes given as a boolean mask or an array of indices'''
+        keep = np.asarray(keep)
+        if keep.dtype != bool:
+            mask = np.zeros(len(self.nodes), dtype=bool)
+            mask[keep] = True
+            keep = mask
+        relabel = np.cumsum(keep) - 1
+        sources, targets = self.edge_arrays()
+        inside = keep[sources] & keep[targets]
+        loops = self.loops[keep[self.loops]]
+        nodes = [self.nodes[i] for i in np.flatnonzero(keep).tolist()]
+        return CompactGraph.from_edges(nodes, np.concatenate((relabel[sources[inside]], relabel[loops])),
+                                       np.concatenate((relabel[targets[inside]], relabel[loops])))
+
+    def remove_nodes(self, removed):
+        '''returns the graph left after removing the nodes where the boolean mask removed is True'''
+        return self.subgraph(~np.asarray(removed, dtype=bool))
+
+    def largest_component(self):
+        '''returns the subgraph of the largest connected component'''
+        if not len(self.nodes):
+            return self
+        return self.subgraph(self.components()[0])
+
+    def bfs(self, source):
+        '''returns the distance of every node from the source, -1 for nodes it can't reach.
+        The search expands the whole frontier at each level with array operations.'''
+        distances = np.full(len(self.nodes), -1, dtype=np.int64)
+        distances[source] = 0
+        frontier = np.array([source])
+        level = 0
+        while len(frontier):
+            level += 1
+            neighbours = self.indices[gather_ranges(self.indptr[frontier], self.indptr[frontier+1])]
+            frontier = np.unique(neighbours[distances[neighbours] < 0])
+            distances[frontier] = level
+        return distances
+
+    def edge_indices(self, edges):
+        '''converts a list of edges given as pairs of node names to their
+        position in edge_arrays(), skipping self loops'''
+        sources, targets = self.edge_arrays()
+        position = {(s,t):e for e,(s,t) in enumerate(zip(sources.tolist(), targets.tolist()))}
+        indices = []
+        for s,t in edges:
+            i, j = self.index[s], self.index[t]
+            if i != j:
+                indices.append(position[(min(i,j),max(i,j))])
+        return indices
+
+
+def gather_ranges(starts, ends):
+    '''returns the concatenation of the ranges [starts[i], ends[i]) as one array of positions'''
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum())
+
+def as_compact(G):
+    '''returns G as a CompactGraph, converting it if it is a networkx graph'''
+    if isinstance(G, CompactGraph):
+        return G
+    return CompactGraph.from_networkx(G)
@@ -0,0 +1,159 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Binary cache of parsed and filtered networks. The columns returned by
+make_network.import_columns for a network, edgetype and filterNonOtus
+setting are saved as a numpy archive next to the text files, along with
+the CSR adjacency arrays of the graph. A small json file keeps the size,
+modification time and content hash of the node and edge files: a cached
+network is used as long as the files have the same size and either the
+same modification time or, if they were touched, the same content.
+'''
+
+#library imports
+import sys
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+
+from compact_graph import CompactGraph
+from make_network import table_name
+
+GRAPH_CACHE_FOLDER = 'graph_cache'
+CACHE_VERSION = 2 #bumped when the layout of the cached columns changes
+HASH_BLOCK = 1024*1024
+
+
+def cache_name(nodeFile, edgeFile, edgetype, filterNonOtus):
+    '''returns the path of the cache files of a network, without extension'''
+    folder = os.path.join(os.path.dirname(os.path.abspath(edgeFile)), GRAPH_CACHE_FOLDER)
+    network = table_name(edgeFile)
+    return os.path.join(folder, '{0}_{1}_{2}'.format(network, edgetype, 'otus' if filterNonOtus else 'all'))
+
+def file_hash(fileName):
+    '''returns the sha1 of the content of a file, read block by block'''
+    h = hashlib.sha1()
+    with open(fileName, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), ''):
+            h.update(block)
+    return h.hexdigest()
+
+def file_stamp(fileName):
+    return {'size':os.path.getsize(fileName), 'mtime':os.path.getmtime(fileName), 'sha1':file_hash(fileName)}
+
+def is_fresh(stamps, files):
+    '''checks whether the files are unchanged since their stamps were taken. Only
+    files with the same size but a new modification time are hashed. Returns
+    True or False, and whether the stamps were refreshed.'''
+    refreshed = False
+    for f in files:
+        stamp = stamps.get(f)
+        if stamp is None or not os.path.exists(f) or os.path.getsize(f) != stamp['size']:
+            return False, refreshed
+        if os.path.getmtime(f) != stamp['mtime']:
+            if file_hash(f) != stamp['sha1']:
+                return False, refreshed
+            stamp['mtime'] = os.path.getmtime(f)
+            refreshed = True
+    return True, refreshed
+
+def load_archive(nodeFile, edgeFile, edgetype, filterNonOtus):
+    '''returns the cached archive of a network and its property names,
+    or None if there is none or the files have changed'''
+    name = cache_name(nodeFile, edgeFile, edgetype, filterNonOtus)
+    if not os.path.exists(name+'.json') or not os.path.exists(name+'.npz'):
+        return None
+    try:
+        with open(name+'.json', 'r') as f:
+            meta = json.load(f)
+    except ValueError:
+        return None #unreadable, it is written again
+    if meta.get('version') != CACHE_VERSION:
+        return None
+    fresh, refreshed = is_fresh(meta['stamps'], [nodeFile, edgeFile])
+    if not fresh:
+        return None
+    if refreshed:
+        save_meta(name, meta)
+    return np.load(name+'.npz'), meta
+
+def load_columns(nodeFile, edgeFile, edgetype, filterNonOtus):
+    '''returns the cached columns of a network, as returned by
+    make_network.import_columns, or None if the files have changed'''
+    cached = load_archive(nodeFile, edgeFile, edgetype, filterNonOtus)
+    if cached is None:
+        return None
+    archive, meta = cached
+    nodes = archive['nodes'].tolist()
+    nodeProperties = {str(p):read_column(archive['node_'+p]) for p in meta['nodeProperties']}
+    edgeProperties = {str(p):read_column(archive['edge_'+p]) for p in meta['edgeProperties']}
+    return nodes, nodeProperties, archive['sources'], archive['targets'], edgeProperties
+
+def load_compact(nodeFile, edgeFile, edgetype, filterNonOtus):
+    '''returns the cached CompactGraph of a network, without building its
+    networkx graph, or None if the files have changed'''
+    cached = load_archive(nodeFile, edgeFile, edgetype, filterNonOtus)
+    if cached is None:
+        return None
+    archive, meta = cached
+    return CompactGraph(archive['nodes'].tolist(), archive['indptr'], archive['indices'], archive['loops'])
+
+def save_columns(columns, nodeFile, edgeFile, edgetype, filterNonOtus):
+    '''saves the columns of a network and its CSR arrays along with the stamps of its files'''
+    nodes, nodeProperties, sources, targets, edgeProperties = columns
+    name = cache_name(nodeFile, edgeFile, edgetype, filterNonOtus)
+    make_folder(os.path.dirname(name))
+    C = compact_columns(columns)
+    arrays = {'nodes':np.array(nodes), 'sources':sources, 'targets':targets,
+                'indptr':C.indptr, 'indices':C.indices, 'loops':C.loops}
+    for prefix,properties in [('node_',nodeProperties), ('edge_',edgeProperties)]:
+        for p,column in properties.iteritems():
+            arrays[prefix+p] = np.array(column)
+    replace_file(name+'.npz', lambda f: np.savez(f, **arrays))
+    meta = {'version':CACHE_VERSION,
+            'stamps':{f:file_stamp(f) for f in [nodeFile, edgeFile]},
+            'nodeProperties':nodeProperties.keys(),
+            'edgeProperties':edgeProperties.keys()}
+    save_meta(name, meta)
+    return None
+
+def compact_columns(columns):
+    '''returns the CompactGraph of the columns of a network'''
+    nodes, nodeProperties, sources, targets, edgeProperties = columns
+    return CompactGraph.from_edges(nodes, sources, targets)
+
+def save_meta(name, meta):
+    replace_file(name+'.json', lambda f: json.dump(meta, f))
+    return None
+
+def make_folder(folder):
+    '''makes a folder unless it exists, also if another process makes it at the same time'''
+    try:
+        os.makedirs(folder)
+    except OSError:
+        if not os.path.isdir(folder):
+            raise
+    return None
+
+def replace_file(fileName, write):
+    '''Writes a file by calling write on a temporary file of its own in the same
+    folder, then renaming it into place. Processes writing the same file at once
+    never rename each other's temporary file, and readers never see half a file.'''
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(fileName), prefix=os.path.basename(fileName)+'.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.rename(temporary, fileName)
+    except:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return None
+
+def read_column(array):
+    '''string columns are given back as lists, like the text loader does'''
+    return array.tolist() if array.dtype.kind == 'S' else array
@@ -0,0 +1,349 @@
+'''
+created  10/18/2026
+
+by sperez
+
+On-disk graph store for networks too large to hold as networkx graphs.
+A store is a folder of numpy files: the node names, the CSR offsets and
+neighbour arrays of the graph, and one file per node or edge attribute,
+edge attributes being aligned with the neighbour array. Stores are opened
+as MappedGraphs, CompactGraphs whose arrays are memory mapped, so only the
+pages that are used are read. Edge files are converted block by block
+and the CSR arrays are filled by a counting sort over temporary files,
+so building a store never holds all the edges in memory either.
+'''
+
+#library imports
+import sys
+import os
+import json
+import shutil
+import argparse
+import numpy as np
+
+from compact_graph import CompactGraph, INDEX_TYPE
+from make_network import read_table, get_delimiter, open_table, table_name, iter_column_blocks, format_properties, convert_gexf, convert_graphml, CHUNK_BYTES
+from graph_cache import file_stamp, is_fresh
+
+STORE_FOLDER = 'graph_store'
+STORE_VERSION = 2
+BLOCK_EDGES = 4*1024*1024 #number of edges read from disk at a time
+META_FILE = 'meta.json'
+
+
+class MappedGraph(CompactGraph):
+    '''CompactGraph stored in a graph store folder, with memory mapped CSR arrays
+    and attribute columns. Node names and node indexed arrays are loaded.'''
+
+    def __init__(self, folder):
+        with open(os.path.join(folder, META_FILE), 'r') as f:
+            self.meta = json.load(f)
+        self.folder = folder
+        nodes = np.load(os.path.join(folder, 'nodes.npy')).tolist()
+        indptr = np.load(os.path.join(folder, 'indptr.npy'))
+        loops = np.load(os.path.join(folder, 'loops.npy'))
+        CompactGraph.__init__(self, nodes, indptr, load_mapped(os.path.join(folder, 'indices.npy')), loops)
+
+    def adjacency_lists(self):
+        '''the mapped arrays are indexed in place instead of being copied to lists'''
+        return self.indptr, self.indices
+
+    def component_labels(self):
+        return chunked_component_labels(self.indptr, self.indices)
+
+    def node_attribute(self, name):
+        '''returns the memory mapped column of a node attribute'''
+        return load_mapped(os.path.join(self.folder, 'node_'+name+'.npy'))
+
+    def edge_attribute(self, name):
+        '''returns the memory mapped column of an edge attribute, aligned with the neighbour
+        array. Text attributes are given as codes into edge_categories(name).'''
+        return load_mapped(os.path.join(self.folder, 'edge_'+name+'.npy'))
+
+    def edge_categories(self, name):
+        return self.meta['categories'][name]
+
+
+def load_mapped(fileName):
+    '''memory maps a numpy file, or loads it if it is empty since empty arrays can't be mapped'''
+    try:
+        return np.load(fileName, mmap_mode='r')
+    except ValueError:
+        return np.load(fileName)
+
+def row_blocks(indptr, blockEdges=BLOCK_EDGES):
+    '''yields ranges of rows of a CSR graph holding about blockEdges neighbours each'''
+    N = len(indptr)-1
+    start = 0
+    while start < N:
+        end = int(np.searchsorted(indptr, indptr[start]+blockEdges, side='right'))-1
+        end = min(max(end, start+1), N)
+        yield start, end
+        start = end
+
+def chunked_component_labels(indptr, indices, blockEdges=BLOCK_EDGES):
+    '''Returns the number of connected components and the component of each node,
+    reading the neighbour array block by block. Each block hooks the root of the
+    larger label under the smaller one and the forest is then flattened, until
+    a sweep over all the edges joins nothing.'''
+    N = len(indptr)-1
+    parent = np.arange(N)
+    changed = True
+    while changed:
+        changed = False
+        for start, end in row_blocks(indptr, blockEdges):
+            rows = np.repeat(np.arange(start, end), np.diff(indptr[start:end+1]))
+            cols = np.asarray(indices[indptr[start]:indptr[end]])
+            rootRows, rootCols = parent[rows], parent[cols]
+            differ = rootRows != rootCols
+            if differ.any():
+                changed = True
+                np.minimum.at(parent, np.maximum(rootRows[differ], rootCols[differ]), np.minimum(rootRows[differ], rootCols[differ]))
+                while True:
+                    grandparent = parent[parent]
+                    if (grandparent == parent).all():
+                        break
+                    parent = grandparent
+    roots, labels = np.unique(parent, return_inverse=True)
+    return len(roots), labels
+
+
+def store_folder(nodeFile, edgeFile, edgetype, filterNonOtus):
+    '''returns the store folder of a network next to its files'''
+    folder = os.path.join(os.path.dirname(os.path.abspath(edgeFile)), STORE_FOLDER)
+    network = table_name(edgeFile)
+    return os.path.join(folder, '{0}_{1}_{2}'.format(network, edgetype, 'otus' if filterNonOtus else 'all'))
+
+def is_current(folder, files):
+    '''checks that a store exists and was made from the files as they are now'''
+    metaFile = os.path.join(folder, META_FILE)
+    if not os.path.exists(metaFile):
+        return False
+    with open(metaFile, 'r') as f:
+        meta = json.load(f)
+    if meta.get('version') != STORE_VERSION:
+        return False
+    return is_fresh(meta['stamps'], files)[0]
+
+def open_graph(nodeFile, edgeFile, edgetype, filterNonOtus):
+    '''opens the store of a network, converting its files first if needed'''
+    folder = store_folder(nodeFile, edgeFile, edgetype, filterNonOtus)
+    if not is_current(folder, [nodeFile, edgeFile]):
+        convert_text(nodeFile, edgeFile, folder, edgetype, filterNonOtus)
+    return MappedGraph(folder)
+
+
+def convert_text(nodeFile, edgeFile, folder, edgetype='both', filterNonOtus=True, blockEdges=BLOCK_EDGES):
+    '''Converts the node and edge files of a network into a store, keeping the same
+    graph as make_network.import_columns: edges between listed nodes, OTUs only if
+    filterNonOtus, the last listing of a repeated edge deciding its sign and
+    attributes and no nodes left without edges. Self loops are listed apart from the
+    CSR arrays, without their attributes. The edges are read
+    and sorted block by block so memory stays bounded by the number of nodes.'''
+    if os.path.exists(folder):
+        shutil.rmtree(folder)
+    os.makedirs(folder)
+
+    header, nodeColumns = read_table(nodeFile, strings=1)
+    names = nodeColumns[0]
+    index = {}
+    for i,n in enumerate(names):
+        index.setdefault(n, i)
+    N = len(names)
+    isOtu = np.array([('Otu' in n) or not filterNonOtus for n in names] + [False], dtype=bool) #the last entry is for unlisted nodes
+
+    #first pass: filter the edges block by block, count the entries of each row and write end points and attributes to temporary files
+    delimiter = get_delimiter(edgeFile)
+    entries = np.zeros(N+1, dtype=np.int64)
+    edges = 0
+    temporary = {}
+    categories = {}
+    numeric = None
+    with open_table(edgeFile) as f:
+        edgeHeader = f.readline().rstrip('\r\n').split(delimiter)
+        properties = format_properties(edgeHeader[2:])
+        if edgetype != 'both' and 'interactionType' not in properties:
+            raise ValueError('The edges of {0} have no interactionType to keep {1} edges'.format(edgeFile, edgetype))
+        for columns in iter_column_blocks(f, delimiter, len(edgeHeader), CHUNK_BYTES):
+            sources = np.array([index.get(n, N) for n in columns[0]], dtype=np.int64)
+            targets = np.array([index.get(n, N) for n in columns[1]], dtype=np.int64)
+            keep = isOtu[sources] & isOtu[targets]
+            if numeric is None:
+                numeric = [is_numeric(c) for c in columns[2:]]
+            write_temporary(temporary, folder, 'sources', sources[keep].astype(INDEX_TYPE))
+            write_temporary(temporary, folder, 'targets', targets[keep].astype(INDEX_TYPE))
+            for p, values, isNumber in zip(properties, columns[2:], numeric):
+                if isNumber:
+                    column = parse_numbers(values)
+                else:
+                    codes = categories.setdefault(p, {})
+                    column = np.array([codes.setdefault(v, len(codes)) for v in values], dtype=np.int32)
+                write_temporary(temporary, folder, p, column[keep])
+            entries += np.bincount(sources[keep], minlength=N+1) + np.bincount(targets[keep], minlength=N+1)
+            edges += int(keep.sum())
+    numeric = numeric or [True]*len(properties)
+    types = dict([('indices', INDEX_TYPE)] + [(p, np.float64 if isNumber else np.int32) for p, isNumber in zip(properties, numeric)])
+    if edgetype == 'both':
+        rightSign = None
+    else:
+        wrongSign = 'mutualExclusion' if edgetype == 'pos' else 'copresence'
+        codes = categories.get('interactionType', {})
+        rightSign = np.array([wrongSign not in c for c in sorted(codes, key=codes.get)], dtype=bool)
+
+    #second pass: counting sort of both directions of every edge by row, keeping the file order within rows
+    indptr = np.zeros(N+1, dtype=np.int64)
+    np.cumsum(entries[:N], out=indptr[1:])
+    unsorted = {}
+    for name in types:
+        unsorted[name] = np.lib.format.open_memmap(os.path.join(folder, 'unsorted_'+name+'.npy'), mode='w+', dtype=types[name], shape=(int(indptr[-1]),))
+    mapped = {name:read_temporary(*t) for name,t in temporary.iteritems()}
+    cursor = indptr[:-1].copy()
+    for start in xrange(0, edges, blockEdges):
+        sources = mapped['sources'][start:start+blockEdges]
+        targets = mapped['targets'][start:start+blockEdges]
+        rows = np.column_stack((sources, targets)).ravel()
+        order = np.argsort(rows, kind='mergesort')
+        rows = rows[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+        positions = cursor[rows] + rank
+        unsorted['indices'][positions] = np.column_stack((targets, sources)).ravel()[order]
+        for p in properties:
+            unsorted[p][positions] = np.repeat(mapped[p][start:start+blockEdges], 2)[order]
+        cursor += np.bincount(rows, minlength=N)
+    mapped = None
+    for path, dtype in temporary.values():
+        os.remove(path)
+
+    #third pass: sort the neighbours of each node, keep the last listing of repeated edges and drop edges of the wrong sign,
+    #and take self loops out of the rows
+    counts = np.zeros(N, dtype=np.int64)
+    loops = []
+    outputs = {name:open(os.path.join(folder, 'sorted_'+name+'.raw'), 'wb') for name in types}
+    for start, end in row_blocks(indptr, blockEdges):
+        rows = np.repeat(np.arange(start, end), np.diff(indptr[start:end+1]))
+        cols = np.asarray(unsorted['indices'][indptr[start]:indptr[end]])
+        order = np.lexsort((cols, rows))
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (rows[order][1:] != rows[order][:-1]) | (cols[order][1:] != cols[order][:-1])
+        kept = order[last]
+        if rightSign is not None:
+            kept = kept[rightSign[np.asarray(unsorted['interactionType'][indptr[start]:indptr[end]])[kept]]]
+        isLoop = rows[kept] == cols[kept]
+        loops.append(rows[kept[isLoop]])
+        kept = kept[~isLoop]
+        counts[start:end] = np.bincount(rows[kept] - start, minlength=end-start)
+        for name in types:
+            np.asarray(unsorted[name][indptr[start]:indptr[end]])[kept].tofile(outputs[name])
+    for output in outputs.values():
+        output.close()
+    unsorted = None
+
+    #nodes left without edges are removed
+    loops = np.concatenate(loops) if loops else np.zeros(0, dtype=np.int64)
+    counts[loops] += 1
+    inGraph = np.flatnonzero(counts)
+    counts[loops] -= 1
+    relabel = np.zeros(N, dtype=INDEX_TYPE)
+    relabel[inGraph] = np.arange(len(inGraph))
+    indptr = np.zeros(len(inGraph)+1, dtype=np.int64)
+    np.cumsum(counts[inGraph], out=indptr[1:])
+    np.save(os.path.join(folder, 'indptr.npy'), indptr)
+    np.save(os.path.join(folder, 'nodes.npy'), np.array([names[i] for i in inGraph.tolist()]))
+    np.save(os.path.join(folder, 'loops.npy'), relabel[loops])
+    nodeProperties = format_properties(header[1:])
+    for p, column in zip(nodeProperties, nodeColumns[1:]):
+        np.save(os.path.join(folder, 'node_'+p+'.npy'), np.array(column)[inGraph])
+    for name in types:
+        output = 'indices.npy' if name == 'indices' else 'edge_'+name+'.npy'
+        copy_to_npy(os.path.join(folder, 'sorted_'+name+'.raw'), os.path.join(folder, output), types[name], relabel if name == 'indices' else None)
+        os.remove(os.path.join(folder, 'sorted_'+name+'.raw'))
+        os.remove(os.path.join(folder, 'unsorted_'+name+'.npy'))
+
+    meta = {'version':STORE_VERSION,
+            'stamps':{f:file_stamp(f) for f in [nodeFile, edgeFile]},
+            'edgetype':edgetype,
+            'filterNonOtus':filterNonOtus,
+            'nodeProperties':nodeProperties,
+            'edgeProperties':properties,
+            'categories':{p:sorted(codes, key=codes.get) for p,codes in categories.iteritems()}}
+    with open(os.path.join(folder, META_FILE), 'w') as f:
+        json.dump(meta, f)
+    print "Stored the network with N = {0}, E = {1} in {2}".format(len(inGraph), indptr[-1]/2+len(loops), folder)
+    return folder
+
+def convert_xml(inputFile, inputFormat, folder, edgetype='both', filterNonOtus=True):
+    '''converts a gexf or graphml network to node and edge files, then into a store'''
+    if inputFormat == 'gexf':
+        convert_gexf(inputFile)
+    else:
+        convert_graphml(inputFile)
+    fileName = inputFile.split('.'+inputFormat)[0]
+    return convert_text(fileName+'_nodes.csv', fileName+'_edges.csv', folder, edgetype, filterNonOtus)
+
+
+def is_numeric(values):
+    try:
+        np.array(values, dtype=np.float64)
+        return True
+    except ValueError:
+        return False
+
+def parse_numbers(values):
+    '''parses a block of a numeric column, with nan for values that aren't numbers'''
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        return np.array([to_number(v) for v in values], dtype=np.float64)
+
+def to_number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+def write_temporary(temporary, folder, name, array):
+    '''appends an array to the temporary file of a column and keeps its path and type'''
+    path = os.path.join(folder, name+'.tmp')
+    with open(path, 'ab') as f:
+        array.tofile(f)
+    temporary[name] = (path, array.dtype)
+    return None
+
+def read_temporary(path, dtype):
+    '''maps the temporary file of a column, which may be empty'''
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+def copy_to_npy(rawFile, npyFile, dtype, relabel=None, blockEdges=BLOCK_EDGES):
+    '''copies a raw binary array file into a numpy file block by block, relabeling its values if given'''
+    size = os.path.getsize(rawFile)/np.dtype(dtype).itemsize
+    output = np.lib.format.open_memmap(npyFile, mode='w+', dtype=dtype, shape=(size,))
+    with open(rawFile, 'rb') as f:
+        for start in xrange(0, size, blockEdges):
+            block = np.fromfile(f, dtype=dtype, count=blockEdges)
+            output[start:start+len(block)] = block if relabel is None else relabel[block]
+    output.flush()
+    del output
+    return None
+
+
+def main(*argv):
+    '''converts a network to a graph store'''
+    parser = argparse.ArgumentParser(description='This script converts networks to memory mapped graph stores')
+    parser.add_argument('-nodes', help='Node file of the network')
+    parser.add_argument('-edges', help='Edge file of the network')
+    parser.add_argument('-input', help='gexf or graphml network file, instead of node and edge files')
+    parser.add_argument('-format', help='Input format of network: gexf or graphml')
+    parser.add_argument('-output', help='Folder of the store')
+    parser.add_argument('-edgetype', help='Specify which types edges to use', default = 'both')
+    parser.add_argument('-allnodes', help='Keeps nodes that are not OTUs', action = 'store_true')
+    args = parser.parse_args()
+
+    if args.input:
+        convert_xml(args.input, args.format, args.output, args.edgetype, not args.allnodes)
+    else:
+        convert_text(args.nodes, args.edges, args.output, args.edgetype, not args.allnodes)
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
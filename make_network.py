@@ -9,6 +9,8 @@ Contains functions used by hive class to measure things like network properties
 import sys
 import os
 import argparse
+import itertools
+import time
 
 # #need a specific version of networkx for read_gexf to work
 # #import pkg_resources
@@ -18,6 +20,25 @@ import networkx as nx
 import string
 import numpy as np
 from math import pi
+from xml.etree.cElementTree import iterparse
+import gzip
+import bz2
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None #xz tables can't be read without lzma
+
+CHUNK_BYTES = 16*1024*1024 #size of the blocks of a table parsed at a time
+SAMPLE_ROWS = 1000 #rows used to infer the type of each column
+COLUMN_TYPES = [np.int64, np.float64, str] #a column gets the first type all its values fit in
+MISSING_VALUE = 'None'
+BENCHMARK_EDGES = 1000000
+XML_BATCH_ROWS = 10000 #rows written to the csv files at a time when converting gexf or graphml networks
+SNIFF_BYTES = 16*1024 #bytes read from the start of a table to detect its delimiter
+COMPRESSIONS = ['.gz', '.bz2', '.xz'] #tables can be compressed, with the compression extension after their own
 
 def import_gexf(gexfFile):
     #parse graphml file
@@ -31,154 +52,379 @@ def import_graphml(graphmlFile):
 
 def import_graph(nodeFile, edgeFile, edgetype, filterNonOtus, filterEdges = True):
     '''make a networkx graph from a csv or tsv'''
+    return build_graph(*import_columns(nodeFile, edgeFile, edgetype, filterNonOtus, filterEdges))
+
+def import_columns(nodeFile, edgeFile, edgetype, filterNonOtus, filterEdges = True):
+    '''Reads and filters the node and edge files of a network and returns it as columns:
+    - the names of the nodes left in the graph, listed nodes first in file order
+    - a dictionary of node property columns, which only cover the listed nodes
+    - two arrays with the indices of the end points of each edge left, in file order
+    - a dictionary of edge property columns.
+    Columns are numpy arrays for numeric properties and lists of strings otherwise.
+    The files are only parsed again for other edgetypes and filters if the network
+    wasn't the last one parsed and networks aren't kept with keep_parsed.'''
+    return network_columns(parse_network(nodeFile, edgeFile), edgetype, filterNonOtus, filterEdges)
+
+_parsed = {} #networks already parsed, by files and their size and modification time
+_keepParsed = {'all':False} #whether every network parsed is kept or only the last one
+
+def keep_parsed(keep=True):
+    '''Sets whether every network parsed is kept until keep_parsed(False) is called,
+    e.g. to parse each network once for several types of edges, or only the last
+    one. Turning it off drops the networks kept.'''
+    _keepParsed['all'] = keep
+    if not keep:
+        _parsed.clear()
+    return None
+
+def forget_parsed(nodeFile, edgeFile):
+    '''drops the parsed files of a network, if they were kept, once its graphs are made'''
+    for key in [k for k in _parsed if [f for f,size,mtime in k] == [nodeFile, edgeFile]]:
+        del _parsed[key]
+    return None
+
+def parse_network(nodeFile, edgeFile):
+    '''Parses the node and edge files of a network, or returns them if they were already
+    parsed, are unchanged and were kept (see keep_parsed). Node names are interned
+    as integers: the listed nodes first, then nodes only found in the edge file. The
+    interactionType of edges is encoded as a categorical code, the index of its value
+    in a list of categories.'''
+    key = tuple((f, os.path.getsize(f), os.path.getmtime(f)) for f in [nodeFile, edgeFile])
+    if key in _parsed:
+        return _parsed[key]
     
     nodes, nodeProperties = get_nodes(nodeFile)
     sources, targets, edgeProperties = get_edges(edgeFile)
     
-    G = make_graph(sources, targets, nodes, filterEdges)
+    index = {}
     for i,n in enumerate(nodes):
-        for p,v in nodeProperties.iteritems():
-            G.node[n][p] = v[i]
-
-    for i,e in enumerate(zip(sources, targets)):
-        s,t = e[0],e[1]
-        if filterEdges:
-            if s not in nodes or t not in nodes:
-                continue
-        if edgetype == 'pos' and 'mutualExclusion' in edgeProperties['interactionType'][i]:
-            G.remove_edge(s,t)
-        elif edgetype == 'neg' and 'copresence' in edgeProperties['interactionType'][i]:
-            G.remove_edge(s,t)
-        elif (filterEdges and s in nodes and t in nodes) or (not filterEdges):
-            for p,v in edgeProperties.iteritems():
-                G[s][t][p] = v[i]
-
+        index.setdefault(n, i)
+    names = list(nodes)
+    for n in itertools.chain(sources, targets):
+        if n not in index:
+            index[n] = len(names)
+            names.append(n)
+    
+    parsed = {'names':names,
+            'listed':len(nodes),
+            'nodeProperties':nodeProperties,
+            'sources':np.array([index[n] for n in sources], dtype=np.int64),
+            'targets':np.array([index[n] for n in targets], dtype=np.int64),
+            'edgeProperties':edgeProperties}
+    if 'interactionType' in edgeProperties:
+        categories, codes = np.unique(np.array(edgeProperties.pop('interactionType')), return_inverse=True)
+        parsed['categories'] = categories.tolist()
+        parsed['codes'] = codes
+    if not _keepParsed['all']:
+        _parsed.clear()
+    _parsed[key] = parsed
+    return parsed
+
+def sign_mask(parsed, edgetype):
+    '''returns a boolean mask of the edges of the right sign for edgetype (pos, neg or both)'''
+    if edgetype == 'pos':
+        wrongSign = 'mutualExclusion'
+    elif edgetype == 'neg':
+        wrongSign = 'copresence'
+    else:
+        return np.ones(len(parsed['sources']), dtype=bool)
+    rightCategories = np.array([wrongSign not in c for c in parsed['categories']], dtype=bool)
+    return rightCategories[parsed['codes']]
+
+def kept_edges(parsed, edgetype, filterNonOtus, filterEdges = True):
+    '''Returns the indices, in file order, of the edges to put in the graph: edges
+    between listed nodes (if filterEdges), of the right sign for edgetype and between
+    OTUs (if filterNonOtus). If an edge is listed more than once, the last listing
+    decides: it is dropped if that one has the wrong sign.'''
+    sources, targets = parsed['sources'], parsed['targets']
+    valid = np.ones(len(sources), dtype=bool)
+    if filterEdges:
+        valid &= (sources < parsed['listed']) & (targets < parsed['listed'])
     if filterNonOtus:
-        for node in G.nodes():
-            if 'Otu' not in node:
-                G.remove_node(node)
-
-    for n in G.nodes():
-        if G.degree(n) == 0:
-            G.remove_node(n)
+        isOtu = np.array(['Otu' in n for n in parsed['names']], dtype=bool)
+        valid &= isOtu[sources] & isOtu[targets]
+    candidates = np.flatnonzero(valid)
+    
+    #last listing of each edge, either way round
+    low = np.minimum(sources[candidates], targets[candidates])
+    high = np.maximum(sources[candidates], targets[candidates])
+    keys = low*len(parsed['names']) + high
+    unique, first = np.unique(keys[::-1], return_index=True)
+    last = np.sort(candidates[len(candidates)-1-first])
+    return last[sign_mask(parsed, edgetype)[last]]
+
+def network_columns(parsed, edgetype, filterNonOtus, filterEdges = True):
+    '''returns the columns of the graph of a parsed network for an edgetype and filters'''
+    kept = kept_edges(parsed, edgetype, filterNonOtus, filterEdges)
+    sources, targets = parsed['sources'][kept], parsed['targets'][kept]
+    
+    #only nodes with an edge left are kept, so nodes of degree 0 are never in the graph
+    listed = parsed['listed']
+    inGraph = np.zeros(len(parsed['names']), dtype=bool)
+    inGraph[sources] = True
+    inGraph[targets] = True
+    graphNodes = np.flatnonzero(inGraph[:listed])
+    #nodes missing from the node file, only without filterEdges, in order of appearance
+    endPoints = np.column_stack((sources, targets)).ravel()
+    unlisted, first = np.unique(endPoints, return_index=True)
+    appearance = unlisted[np.argsort(first)]
+    graphNodes = np.concatenate((graphNodes, appearance[appearance >= listed]))
+    
+    relabel = np.zeros(len(parsed['names']), dtype=np.int64)
+    relabel[graphNodes] = np.arange(len(graphNodes))
+    nodes = [parsed['names'][i] for i in graphNodes.tolist()]
+    nodeProperties = {p:select_rows(v, graphNodes[graphNodes < listed]) for p,v in parsed['nodeProperties'].iteritems()}
+    edgeProperties = {p:select_rows(v, kept) for p,v in parsed['edgeProperties'].iteritems()}
+    if 'codes' in parsed:
+        edgeProperties['interactionType'] = [parsed['categories'][c] for c in parsed['codes'][kept].tolist()]
+    
+    return nodes, nodeProperties, relabel[sources], relabel[targets], edgeProperties
 
+def build_graph(nodes, nodeProperties, sources, targets, edgeProperties):
+    '''makes the networkx graph of the columns returned by import_columns'''
+    nodeProperties = {p:column_values(v) for p,v in nodeProperties.iteritems()}
+    edgeProperties = {p:column_values(v) for p,v in edgeProperties.iteritems()}
+    attributed = min([len(v) for v in nodeProperties.values()] + [len(nodes)])
+    
+    G = nx.Graph()
+    G.add_nodes_from((n, {p:v[i] for p,v in nodeProperties.iteritems()}) for i,n in enumerate(nodes[:attributed]))
+    G.add_nodes_from(nodes[attributed:])
+    G.add_edges_from((nodes[s], nodes[t], {p:v[i] for p,v in edgeProperties.iteritems()}) for i,(s,t) in enumerate(itertools.izip(sources.tolist(), targets.tolist())))
+    
     return G
 
+
 def convert_gexf(gexfFile):
-    G = import_gexf(gexfFile)
+    '''converts a gexf network to node and edge csv files, streaming through the xml'''
     fileName = gexfFile.split('.gexf')[0]
-    convert_graph(G,fileName)
+    write_network(fileName, gexf_elements(gexfFile))
 
 def convert_graphml(graphmlFile):
-    G = import_graphml(graphmlFile)
+    '''converts a graphml network to node and edge csv files, streaming through the xml'''
     fileName = graphmlFile.split('.graphml')[0]
-    convert_graph(G,fileName)
+    write_network(fileName, graphml_elements(graphmlFile))
 
 def convert_graph(G,fileName):
-    sources, targets, edgeProperties = zip(*G.edges(data=True))
+    '''converts a networkx graph to node and edge csv files'''
+    nodes = (('node', [n], data) for n,data in G.nodes_iter(data=True))
+    edges = (('edge', [s,t], data) for s,t,data in G.edges_iter(data=True))
+    write_network(fileName, itertools.chain(nodes, edges))
+
+def write_network(fileName, elements):
+    '''Writes the nodes and edges given by elements, tuples of 'node' or 'edge', the node id
+    or end points and a dictionary of properties, to fileName_nodes.csv and fileName_edges.csv.
+    Elements may also be ('nodekeys' or 'edgekeys', property names) to declare columns ahead.'''
     nodeFile = fileName+'_nodes.csv'
     edgeFile = fileName+'_edges.csv'
-    nf = open(nodeFile,'w')
-    keys = []
-    for node, nodeProperties in G.nodes(data=True):
-        new_keys = nodeProperties.keys()
-        if new_keys != keys:
-            keys.extend(new_keys)
-    
-    keys = set(keys)
-    
-    #write header
-    if keys:
-        nf.write('Node'+','+','.join(keys))
-    else:
-        nf.write('Node')        
-    
-    for node, nodeProperties in G.nodes(data=True):
-        row = []
-        row.append(node)
-        for k in keys:
-            if k in nodeProperties.keys():
-                row.append(str(nodeProperties[k]).replace(',', ';'))
-            else:
-                row.append('None')
-        nf.write('\n' + ','.join([str(r) for r in row]))
-    
-    nf.close()
-    
-    ef = open(edgeFile,'w')
-    keys = []
-    for source,target, edgeProperties in G.edges(data=True):
-        new_keys = edgeProperties.keys()
-        if new_keys != keys:
-            keys.extend(new_keys)
-    
-    keys = set(keys)
-    
-    if keys:
-        ef.write('source' + ',' + 'target' + ',' +','.join(keys))
-    else: 
-        ef.write('source' + ',' + 'target')
-
-    for source, target, edgeProperties in G.edges(data=True):
-        row = []
-        row.append(source)
-        row.append(target)
-        for k in keys:
-            if k in edgeProperties.keys():
-                row.append(str(edgeProperties[k]))
-            else:
-                row.append('None')
-        ef.write('\n' + ','.join([str(r) for r in row]))
-    
+    tables = {'node':TableWriter(nodeFile, ['Node']), 'edge':TableWriter(edgeFile, ['source','target'])}
+    for kind, values, properties in elements:
+        if kind.endswith('keys'):
+            tables[kind[:-4]].add_columns(values)
+        else:
+            tables[kind].write(values, properties)
+    for table in tables.values():
+        table.close()
     print "writing nodefile", nodeFile
     print "writing edgefile", edgeFile
     return None
 
+
+class TableWriter(object):
+    '''Writes rows to a csv file in batches. Columns are added as new property names
+    come up, so the header is the union of all the properties without reading the rows
+    twice: rows written before a column was added are padded with MISSING_VALUE, which
+    only needs the file to be rewritten when the header grew after the first rows.'''
+
+    def __init__(self, fileName, fixed, batchRows=XML_BATCH_ROWS):
+        self.fileName = fileName
+        self.fixed = list(fixed)
+        self.columns = []
+        self.index = {}
+        self.batch = []
+        self.batchRows = batchRows
+        self.runs = [] #number of rows written with each width, as [width, rows]
+        self.f = None
+
+    def add_columns(self, names):
+        for name in names:
+            if name not in self.index:
+                self.index[name] = len(self.columns)
+                self.columns.append(name)
+
+    def write(self, values, properties):
+        self.add_columns(properties)
+        row = [MISSING_VALUE]*len(self.columns)
+        for name, value in properties.iteritems():
+            row[self.index[name]] = csv_value(value)
+        self.batch.append(','.join([csv_value(v) for v in values] + row))
+        if self.runs and self.runs[-1][0] == len(self.columns):
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([len(self.columns), 1])
+        if len(self.batch) >= self.batchRows:
+            self.flush()
+
+    def flush(self):
+        if self.f is None:
+            self.f = open(self.fileName, 'w')
+            self.f.write(','.join(self.fixed + self.columns) + '\n')
+        if self.batch:
+            self.f.write('\n'.join(self.batch) + '\n')
+        self.batch = []
+
+    def close(self):
+        self.flush()
+        self.f.close()
+        if self.runs and self.runs[0][0] < len(self.columns):
+            self.pad()
+
+    def pad(self):
+        '''rewrites the file with the full header, padding the rows written with fewer columns'''
+        os.rename(self.fileName, self.fileName+'.tmp')
+        with open(self.fileName+'.tmp', 'r') as old, open(self.fileName, 'w') as new:
+            old.readline()
+            new.write(','.join(self.fixed + self.columns) + '\n')
+            lines = []
+            for width, rows in self.runs:
+                padding = ',' + ','.join([MISSING_VALUE]*(len(self.columns)-width)) if len(self.columns) > width else ''
+                for line in itertools.islice(old, rows):
+                    lines.append(line.rstrip('\n') + padding)
+                    if len(lines) >= self.batchRows:
+                        new.write('\n'.join(lines) + '\n')
+                        lines = []
+            if lines:
+                new.write('\n'.join(lines) + '\n')
+        os.remove(self.fileName+'.tmp')
+
+def csv_value(value):
+    '''formats a value for a csv cell, commas would split it so they are replaced'''
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    return str(value).replace(',', ';')
+
+
+def iter_xml(xmlFile, tags):
+    '''Streams through an xml file and yields the elements with the given tags, without
+    their namespace, once they are complete. Elements are dropped from the tree once
+    yielded so memory doesn't grow with the file. Also yields the start of the elements.'''
+    stack = []
+    for event, elem in iterparse(xmlFile, events=('start','end')):
+        tag = elem.tag.rsplit('}', 1)[-1]
+        if event == 'start':
+            stack.append(elem)
+            if tag in tags:
+                yield 'start', tag, elem
+            continue
+        stack.pop()
+        if tag in tags:
+            yield 'end', tag, elem
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+def xml_value(value, xmlType):
+    '''converts an attribute value of a gexf or graphml file to its declared type'''
+    if value is None:
+        return MISSING_VALUE
+    if xmlType in ['integer','int','long']:
+        return int(value)
+    if xmlType in ['float','double']:
+        return float(value)
+    if xmlType == 'boolean':
+        return value.strip().lower() in ['true','1']
+    return value
+
+def gexf_elements(gexfFile):
+    '''Yields the node and edge rows of a gexf file for write_network, as networkx reads
+    them: attvalues under the title of their attribute, node labels, and the id, weight
+    and label of edges. Nested viz, spells and parents elements are left out.'''
+    keys = {'node':{}, 'edge':{}}
+    attributeClass = None
+    for event, tag, elem in iter_xml(gexfFile, ['attributes','attribute','node','edge']):
+        if event == 'start':
+            if tag == 'attributes':
+                attributeClass = elem.get('class')
+            continue
+        if tag == 'attribute':
+            keys[attributeClass][elem.get('id')] = (elem.get('title'), elem.get('type'))
+            yield attributeClass+'keys', [elem.get('title')], None
+        elif tag in ['node','edge']:
+            properties = {}
+            for a in elem.iter():
+                if a.tag.rsplit('}', 1)[-1] == 'attvalue':
+                    title, xmlType = keys[tag][a.get('for')]
+                    properties[title] = xml_value(a.get('value'), xmlType)
+            for name in ['start','end','pid']:
+                if elem.get(name) is not None:
+                    properties[name] = elem.get(name)
+            if tag == 'node':
+                properties['label'] = elem.get('label', MISSING_VALUE)
+                yield 'node', [elem.get('id')], properties
+            else:
+                if elem.get('id') is not None:
+                    properties['id'] = elem.get('id')
+                if elem.get('weight') is not None:
+                    properties['weight'] = float(elem.get('weight'))
+                if elem.get('label') is not None:
+                    properties['label'] = elem.get('label')
+                yield 'edge', [elem.get('source'), elem.get('target')], properties
+
+def graphml_elements(graphmlFile):
+    '''Yields the node and edge rows of a graphml file for write_network, with the data
+    of each element under the name of its key and the id of edges'''
+    keys = {}
+    for event, tag, elem in iter_xml(graphmlFile, ['key','node','edge']):
+        if event == 'start':
+            continue
+        if tag == 'key':
+            keys[elem.get('id')] = (elem.get('attr.name'), elem.get('attr.type', 'string'))
+            for kind in ['node','edge']:
+                if elem.get('for') in [kind, 'all']:
+                    yield kind+'keys', [elem.get('attr.name')], None
+        else:
+            properties = {}
+            for d in elem:
+                if d.tag.rsplit('}', 1)[-1] == 'data' and d.text is not None and not len(d):
+                    name, xmlType = keys[d.get('key')]
+                    properties[name] = xml_value(d.text, xmlType)
+            if tag == 'node':
+                yield 'node', [elem.get('id')], properties
+            else:
+                if elem.get('id'):
+                    properties['id'] = elem.get('id')
+                yield 'edge', [elem.get('source'), elem.get('target')], properties
+
 def make_graph(sources, targets, nodes, filterEdges= True):
     '''Makes a graph using the networkx package Graph instance'''
     G = nx.Graph()
     G.add_edges_from(zipper(sources,targets))
     if filterEdges:
-        for n in G.nodes():
-            if n not in nodes:
-                G.remove_node(n)
+        listed = set(nodes)
+        G.remove_nodes_from([n for n in G.nodes() if n not in listed])
     return G
 
 
 def get_nodes(inputFile,removeNA=None):
     '''gets nodes and their properties from csv file'''
     
-    delimiter = get_delimiter(inputFile)
-
-    data = np.genfromtxt(inputFile, delimiter=delimiter, dtype='str', filling_values = 'None')
+    header, columns = read_table(inputFile, strings=1)
     
     #get properties and format as strings
-    properties = data[0,1:]
-    properties = format_properties(properties)
+    properties = format_properties(header[1:])
     
     if removeNA:
         colName = nx.betweenness_centrality.__name__.replace('_',' ').capitalize()
-        col = np.where(data[0,:]==colName)[0][0]
-        #remove first row with column names
-        data = data[1:,]
-        data = data[np.where(data[:,col]!=removeNA)]
-    else:
-        #remove first row with column names
-        data = data[1:,]
+        col = header.index(colName)
+        keep = np.array([str(v) != removeNA for v in columns[col]], dtype=bool)
+        columns = [select_rows(column, keep) for column in columns]
 
     #get all the node data
-    nodes = list(data[:,0])
+    nodes = columns[0]
     
-    #take note of number of nodes
-    totalNodes = len(nodes)
-    
-    #transform node properties into the numerical types if possible
+    #node properties are already parsed into numerical types if possible
     nodeProperties = {}
-
-    for i, column in enumerate(data[:,1:].T):
-        values = convert_type(list(column))
-        nodeProperties[properties[i]] = values
-    nodeProperties = nodeProperties
+    for i, column in enumerate(columns[1:]):
+        nodeProperties[properties[i]] = column
 
     return nodes, nodeProperties
 
@@ -186,36 +432,169 @@ def get_nodes(inputFile,removeNA=None):
 def get_edges(inputFile):
     '''gets edges and their properties from csv file'''
     
-    delimiter = get_delimiter(inputFile)
-    data = np.genfromtxt(inputFile, delimiter=delimiter, dtype='str', filling_values = 'None')
+    header, columns = read_table(inputFile, strings=2)
     
     #get properties and format as strings
-    properties = data[0,2:]
-    properties = format_properties(properties)
-    
-    #remove first row with column names
-    data = data[1:,]
+    properties = format_properties(header[2:])
     
     #get all the edge data
-    sources = list(data[:,0])        
-    targets = list(data[:,1])
-    
-    #take note of number of edges:
-    totalEdges = len(sources)
+    sources = columns[0]
+    targets = columns[1]
 
-    #transform edge properties into the numerical types if possible
+    #edge properties are already parsed into numerical types if possible
     edgeProperties = {}
+    for i, column in enumerate(columns[2:]):
+        edgeProperties[properties[i]] = column
 
-    for i, column in enumerate(data[:,2:].T):
-        values = convert_type(list(column))
-        edgeProperties[properties[i]] = values
-    edgeProperties = edgeProperties
-    
-    #store the name of the edge properties
-    edgePropertyList = edgeProperties.keys()
+    return sources, targets, edgeProperties
 
+def read_table(inputFile, strings=0, chunkBytes=CHUNK_BYTES, sampleRows=SAMPLE_ROWS):
+    '''Reads a csv or tsv file block by block and returns its header and a list
+    of columns. The type of each column is inferred once from its first rows:
+    numeric columns are parsed straight into int or float numpy arrays and the
+    others are lists of strings, as are the first strings columns (node names).
+    If a value further down doesn't fit the inferred type, the column is widened
+    and the file is read again. Unlike the per-cell conversion of the genfromtxt
+    loader, a column mixing int and float cells is read as floats.'''
+    delimiter = get_delimiter(inputFile)
+    types = None
+    while True:
+        header, columns, widened = read_columns(inputFile, delimiter, strings, chunkBytes, sampleRows, types)
+        if widened is None:
+            return header, columns
+        types = widened
+
+def read_columns(inputFile, delimiter, strings, chunkBytes, sampleRows, types=None):
+    '''reads the columns of a table with the given types, or with types inferred
+    from the first rows, and returns the header and columns. If a value doesn't
+    fit the type of its column, returns the widened types instead of the columns.'''
+    with open_table(inputFile) as f:
+        header = f.readline().rstrip('\r\n').split(delimiter)
+        width = len(header)
+        chunks = [[] for h in header]
+        for columns in iter_column_blocks(f, delimiter, width, chunkBytes):
+            if types is None:
+                types = [str]*strings + [infer_type(c[:sampleRows]) for c in columns[strings:]]
+            for j, values in enumerate(columns):
+                try:
+                    chunks[j].append(parse_column(values, types[j]))
+                except (ValueError, OverflowError):
+                    widened = list(types)
+                    widened[j] = COLUMN_TYPES[max(COLUMN_TYPES.index(types[j])+1, COLUMN_TYPES.index(infer_type(values)))]
+                    return header, None, widened
+    columns = []
+    for j, parts in enumerate(chunks):
+        if not parts:
+            columns.append([])
+        elif types[j] is str:
+            columns.append(list(itertools.chain(*parts)))
+        else:
+            columns.append(np.concatenate(parts))
+    return header, columns, None
+
+def iter_column_blocks(f, delimiter, width, chunkBytes=CHUNK_BYTES):
+    '''yields the columns of the rows of an open table, block by block, as lists of strings'''
+    while True:
+        block = f.read(chunkBytes)
+        if not block:
+            break
+        block = (block + f.readline()).replace('\r','') #ends the block with a whole line
+        if not block.endswith('\n'):
+            block += '\n'
+        columns = split_columns(block, delimiter, width)
+        if columns is not None:
+            yield columns
+
+def split_columns(block, delimiter, width):
+    '''splits a block of whole lines into columns, or returns None if it only has blank lines'''
+    cells = block[:-1].replace('\n', delimiter).split(delimiter)
+    if len(cells) == block.count('\n')*width and '\n\n' not in '\n'+block:
+        #every line has all its cells, so the columns are strided slices of the cells
+        return [cells[j::width] for j in range(width)]
+    #skip blank lines and fill in missing cells
+    rows = [line.split(delimiter) for line in block[:-1].split('\n') if line]
+    rows = [r if len(r) == width else (r+[MISSING_VALUE]*width)[:width] for r in rows]
+    if not rows:
+        return None
+    return zip(*rows)
+
+def infer_type(values):
+    '''returns the first of int, float or string that all values can be parsed as.
+    Integers wider than 64 bits are read as floats.'''
+    for t in COLUMN_TYPES[:-1]:
+        try:
+            parse_column(values, t)
+            return t
+        except (ValueError, OverflowError):
+            pass
+    return str
+
+def parse_column(values, t):
+    '''converts a sequence of strings to a numpy array of type t, or to a list
+    of strings if t is str. Empty cells stay empty strings, as genfromtxt gave them'''
+    if t is str:
+        return list(values)
+    return np.array(values, dtype=t)
+
+def select_rows(column, keep):
+    '''selects the rows of a column, array or list, given as a boolean mask or as indices'''
+    if isinstance(column, np.ndarray):
+        return column[keep]
+    if keep.dtype == bool:
+        return [v for v,k in itertools.izip(column, keep) if k]
+    return [column[i] for i in keep]
+
+def column_values(column):
+    '''returns the values of a column as a list of python numbers or strings'''
+    if isinstance(column, np.ndarray):
+        return column.tolist()
+    return column
+
+def get_edges_genfromtxt(inputFile):
+    '''previous edge loader, parsing the whole file as strings with genfromtxt
+    and converting each cell after. Only kept to benchmark read_table.'''
+    
+    delimiter = get_delimiter(inputFile)
+    data = np.genfromtxt(inputFile, delimiter=delimiter, dtype='str', filling_values = 'None')
+    
+    properties = format_properties(data[0,2:])
+    data = data[1:,]
+    sources = list(data[:,0])        
+    targets = list(data[:,1])
+    edgeProperties = {}
+    for i, column in enumerate(data[:,2:].T):
+        edgeProperties[properties[i]] = convert_type(list(column))
     return sources, targets, edgeProperties
 
+def write_benchmark_edges(edgeFile, numberOfEdges=BENCHMARK_EDGES, seed=0):
+    '''writes a random edge file in the format of CoNet exports'''
+    rng = np.random.RandomState(seed)
+    numberOfNodes = max(2, numberOfEdges/10)
+    sources = rng.randint(0, numberOfNodes, size=numberOfEdges)
+    targets = rng.randint(0, numberOfNodes, size=numberOfEdges)
+    signs = rng.randint(0, 2, size=numberOfEdges)
+    weights = rng.uniform(-1, 1, size=numberOfEdges)
+    interactions = ['[copresence, copresence]', '[mutualExclusion, mutualExclusion]']
+    with open(edgeFile, 'w') as f:
+        f.write('source\ttarget\tinteractionType\tweight\n')
+        for s,t,i,w in itertools.izip(sources, targets, signs, weights):
+            f.write('Otu{0:06d}\tOtu{1:06d}\t{2}\t{3:.3f}\n'.format(s, t, interactions[i], w))
+    return None
+
+def benchmark_loaders(edgeFile):
+    '''times the chunked typed reader against the genfromtxt loader on an edge file'''
+    start = time.time()
+    sources, targets, edgeProperties = get_edges(edgeFile)
+    typed = time.time() - start
+    start = time.time()
+    oldSources, oldTargets, oldProperties = get_edges_genfromtxt(edgeFile)
+    legacy = time.time() - start
+    same = sources == oldSources and targets == oldTargets and \
+        all(column_values(edgeProperties[p]) == oldProperties[p] for p in oldProperties)
+    print "Loaded {0} edges from {1}".format(len(sources), edgeFile)
+    print "genfromtxt loader: {0:.2f}s, typed chunked reader: {1:.2f}s ({2:.1f}x faster), same output: {3}".format(legacy, typed, legacy/typed, same)
+    return legacy, typed
+
 def convert_type(data):
     def num(s):
         '''convert list of strings to corresponding int or float type'''
@@ -234,16 +613,16 @@ def get_delimiter(inputFile):
     '''detect if input file is a tab or comma delimited file
         and return delimiter.'''
     
-    ext = os.path.splitext(os.path.basename(inputFile))[1]
+    ext = table_extension(inputFile)
     
     if 'tab' in ext or 'tsv' in ext:
         return '\t'
     elif 'csv' in ext:
         return ','
     elif 'txt' in ext:
-        #detects delimiter by counting the number of tabs and commas in the first line
-        f = open(inputFile, 'r')
-        first = f.read()
+        #detects delimiter by counting the number of tabs and commas in the first lines
+        with open_table(inputFile) as f:
+            first = f.read(SNIFF_BYTES)
         if first.count(',') > first.count('\t'):
             return ','
         elif first.count(',') < first.count('\t'):
@@ -255,6 +634,50 @@ def get_delimiter(inputFile):
         print "Couldn't detect a valid file extension: ", inputFile
         return ','
 
+def compression(inputFile):
+    '''returns the compression extension of a file, or None if it isn't compressed'''
+    ext = os.path.splitext(inputFile)[1].lower()
+    return ext if ext in COMPRESSIONS else None
+
+def table_extension(inputFile):
+    '''returns the extension of a table, before its compression extension if any'''
+    if compression(inputFile):
+        inputFile = os.path.splitext(inputFile)[0]
+    return os.path.splitext(os.path.basename(inputFile))[1]
+
+def table_name(inputFile):
+    '''returns the name of a table file without its folder and extensions'''
+    if compression(inputFile):
+        inputFile = os.path.splitext(inputFile)[0]
+    return os.path.splitext(os.path.basename(inputFile))[0]
+
+def open_table(inputFile):
+    '''opens a table for reading, decompressing it on the fly if it is a gz, bz2 or xz file'''
+    ext = compression(inputFile)
+    if ext == '.gz':
+        return gzip.open(inputFile, 'rb')
+    elif ext == '.bz2':
+        return bz2.BZ2File(inputFile, 'r')
+    elif ext == '.xz':
+        if lzma is None:
+            raise ImportError("Reading {0} needs the lzma module (backports.lzma on python 2)".format(inputFile))
+        return lzma.open(inputFile, 'rb')
+    return open(inputFile, 'r')
+
+def find_table(inputFile):
+    '''returns the name of a table, or of its compressed version if only that one exists'''
+    if os.path.exists(inputFile):
+        return inputFile
+    for ext in COMPRESSIONS:
+        if os.path.exists(inputFile+ext):
+            return inputFile+ext
+    return inputFile
+
+def load_table(inputFile, **kwargs):
+    '''np.loadtxt of a table or of its compressed version'''
+    with open_table(find_table(inputFile)) as f:
+        return np.loadtxt(f, **kwargs)
+
 
 def format_properties(properties, debug = False):
     '''takes a list of property names and removes all punctuation and numbers'''
@@ -301,8 +724,18 @@ def main(*argv):
     parser = argparse.ArgumentParser(description='This scripts converts networks to txt node and edge files')
     parser.add_argument('-input', help='Location of network file')
     parser.add_argument('-format', help='Input format of network')
+    parser.add_argument('-benchmark', help='Times the edge file loaders on the input edge file, or on a random one if there is no input', action = 'store_true')
+    parser.add_argument('-edges', help='Number of edges of the random edge file to benchmark on', default = BENCHMARK_EDGES)
     args = parser.parse_args()
 
+    if args.benchmark:
+        edgeFile = args.input
+        if not edgeFile:
+            edgeFile = 'benchmark_{0}_edges.txt'.format(args.edges)
+            print "Writing random edge file: ", edgeFile
+            write_benchmark_edges(edgeFile, int(args.edges))
+        benchmark_loaders(edgeFile)
+
     if args.format=='graphml':
         print "Converting graphml input file: ", args.input
         convert_graphml(args.input)
@@ -20,76 +20,138 @@ sys.path.insert(0, _root_dir)
 
 import networkx as nx
 from make_network import *
+from compact_graph import CompactGraph, as_compact
+from graph_store import MappedGraph
+import betweenness
+import path_lengths
 
 DECIMALS = 3 #for rounding measures
 FACTOR = 1.5
 
 SOILHORIZON_FEAT_NAME = 'SoilHorizon avg'
+BACKENDS = ['networkx','compact','mapped'] #graphs measured as networkx graphs, as CompactGraphs with CSR arrays or as CompactGraphs mapped from a graph store
+NOT_MEASURED = 'NA' #value of measures skipped on mapped graphs, which are never loaded as networkx graphs
 
 def number_of_nodes(G):
-	return G.number_of_nodes()
+	return measurements(G).graph.number_of_nodes()
 
 def number_of_edges(G):
-	return G.number_of_edges()
+	return measurements(G).graph.number_of_edges()
 
 def number_of_nodes_of_largest_connected_component(G):
-    return len(get_components(G)[0])
+    return len(measurements(G).components()[0])
 
 def number_of_edges_of_largest_connected_component(G):
-    return get_LCC(G).number_of_edges()
+    return measurements(G).LCC().number_of_edges()
 
 def number_of_components(G):
-    return nx.number_connected_components(G)
+    return len(measurements(G).components())
 
 def size_of_big_components(G):
-    cc = get_components(G)
+    cc = measurements(G).components()
     sizes = [str(len(c)) for c in cc if len(c) > 3]
     return ','.join(sizes)
 
 def in_largest_connected_component(G):
-    LCC = get_components(G)[0]
-    members = {n:(1 if n in LCC else 0) for n in G.nodes()}
+    M = measurements(G)
+    LCC = set(M.components()[0])
+    members = {n:(1 if n in LCC else 0) for n in M.nodes()}
     return members
 
 def node_degrees(G):
-    return G.degree()
+    return measurements(G).degrees()
 
 def average_degree(G):
-    return round(np.mean(G.degree().values()), DECIMALS)
+    M = measurements(G)
+    if M.is_compact():
+        return round(np.mean(M.graph.degrees(selfloops=True)), DECIMALS)
+    return round(np.mean(M.degrees().values()), DECIMALS)
 
 def connectance(G):
+    G = measurements(G).graph
+    if is_compact(G):
+        N = G.number_of_nodes()
+        return round(2.0*G.number_of_edges()/(N*(N-1)) if N > 1 else 0, DECIMALS)
     return round(nx.density(G), DECIMALS)
 
 def global_clustering_coefficient(G):
-    return round(nx.average_clustering(G), DECIMALS)
+    M = measurements(G)
+    if M.is_compact():
+        triangles, degrees = M.triangles_and_degrees()
+        possible = degrees*(degrees-1)/2.0
+        clustering = np.where(degrees > 1, triangles/np.maximum(possible, 1), 0)
+        return round(np.mean(clustering), DECIMALS)
+    clustering = M.clustering().values()
+    return round(sum(clustering)/float(len(clustering)), DECIMALS)
 
 def fraction_of_possible_triangles(G):
-    return round(nx.transitivity(G), DECIMALS)
+    M = measurements(G)
+    triangles, degrees = M.triangles_and_degrees()
+    if M.is_compact():
+        triads = np.sum(degrees*(degrees-1))/2.0
+        return round(np.sum(triangles)/triads if triads else 0, DECIMALS)
+    #as nx.transitivity, from the number of triangles through each node counted twice
+    closed = sum(2*t for t in triangles.itervalues())
+    triads = sum(d*(d-1) for d in degrees.itervalues())
+    return round(closed/float(triads) if closed else 0.0, DECIMALS)
 
 def size_of_largest_clique(G):
-    return nx.graph_clique_number(G)
+    M = measurements(G)
+    if M.is_mapped():
+        return NOT_MEASURED
+    return nx.graph_clique_number(M.networkx())
 
 def degree_assortativity(G):
+    G = measurements(G).graph
+    if is_compact(G):
+        #pearson correlation of the degrees at both ends of every edge, taken both ways,
+        #and once for self loops as in networkx
+        degrees = G.degrees(selfloops=True)
+        ends = np.concatenate((np.repeat(degrees, G.degrees()), degrees[G.loops]))
+        return round(np.corrcoef(ends, np.concatenate((degrees[G.indices], degrees[G.loops])))[0,1], DECIMALS)
     return round(nx.degree_assortativity_coefficient(G), DECIMALS)
 
 def diameter_of_largest_connected_component(G):
-    H = get_LCC(G)
-    return nx.diameter(H)
+    M = measurements(G)
+    if path_lengths.is_approximate():
+        #the lower bound of the diameter is given with both bounds
+        estimates = M.path_estimates()
+        return '{0} [lower={0};upper={1};searches={2}]'.format(estimates['lower'], estimates['upper'], estimates['searches'])
+    return int(path_lengths.diameter(M.path_lengths()))
 
 def average_path_on_largest_connected_component(G):
-    H = get_LCC(G)
-    return round(nx.average_shortest_path_length(H), DECIMALS)
+    M = measurements(G)
+    if path_lengths.is_approximate():
+        #the estimated average path is given with its confidence interval
+        estimates = M.path_estimates()
+        low, high = estimates['interval']
+        return '{0} [confidence={1};interval={2}-{3};sources={4}]'.format(round(float(estimates['mean']), DECIMALS),
+                    path_lengths.confidence(), round(low, DECIMALS), round(high, DECIMALS), estimates['sources'])
+    return round(float(path_lengths.average_path(M.path_lengths())), DECIMALS)
+
+def path_length_histogram_of_largest_connected_component(G):
+    '''number of pairs of nodes of the LCC at each distance, from 1 to the diameter'''
+    M = measurements(G)
+    if path_lengths.is_approximate():
+        estimates = M.path_estimates()
+        counts = ','.join([str(count/2) for count in estimates['histogram'][1:].tolist()])
+        return counts + ' [sources={0}]'.format(estimates['sources'])
+    return ','.join([str(count/2) for count in M.path_lengths()[1:].tolist()])
 
 def correlation_of_degree_and_betweenness_centrality(G):
-    bc = nx.betweenness_centrality(G)
-    d = nx.degree(G)
+    M = measurements(G)
+    bc = M.betweenness()
+    d = M.degrees()
     bcn = []
     dn = []
-    for n in G.nodes():
+    for n in M.nodes():
         bcn.append(bc[n])
         dn.append(d[n])
 
     r = scipy.stats.spearmanr(dn, bcn)
+    if betweenness.is_approximate():
+        #the accuracy of approximate betweenness is kept with the value
+        return format_correlation(r[0],r[1]) + ' [{0}]'.format(betweenness.accuracy(M.graph.number_of_nodes()))
     return format_correlation(r[0],r[1])
 
 def format_correlation(avg,std):
@@ -98,10 +160,15 @@ def format_correlation(avg,std):
 
 def get_components(G):
     '''gets connected components, sorts by size and returns a list of lists'''
+    if is_compact(G):
+        return [[G.nodes[i] for i in c] for c in G.components()]
     return sorted(nx.connected_components(G), key = len, reverse=True)
 
 def get_LCC(G):
-    '''gets connected subgraphs and returns LCC as a networkx graph'''
+    '''gets connected subgraphs and returns LCC as a networkx graph,
+    or as a CompactGraph if G is one'''
+    if is_compact(G):
+        return G.largest_component()
     LCC = None
     Ntemp = 0
     for graph in nx.connected_component_subgraphs(G):
@@ -112,6 +179,168 @@ def get_LCC(G):
     return LCC
 
 
+class Measurements(object):
+    '''Intermediate results shared by the measures of one graph, a networkx graph
+    or a CompactGraph: its components, largest connected component, degrees,
+    triangles and centralities. Each one is computed the first time a measure
+    asks for it and kept for the next measures, so that a row of the table of
+    measures of a network goes over each of them once. Measures are given
+    either a graph or its Measurements. Shortest paths are found over jobs
+    processes.'''
+
+    def __init__(self, G, jobs=1):
+        self.graph = G
+        self.jobs = jobs
+        self._memo = {}
+
+    def _memoized(self, name, compute):
+        if name not in self._memo:
+            self._memo[name] = compute()
+        return self._memo[name]
+
+    def is_compact(self):
+        return is_compact(self.graph)
+
+    def is_mapped(self):
+        return isinstance(self.graph, MappedGraph)
+
+    def networkx(self):
+        '''the graph as a networkx graph, converted once if it is a CompactGraph'''
+        return self._memoized('networkx', lambda: as_networkx(self.graph))
+
+    def nodes(self):
+        '''the nodes of the graph, without converting a CompactGraph'''
+        if self.is_compact():
+            return self.graph.nodes
+        return self.graph.nodes()
+
+    def component_indices(self):
+        '''arrays of node indices of the components of a CompactGraph, largest first'''
+        return self._memoized('component_indices', self.graph.components)
+
+    def components(self):
+        '''connected components as collections of nodes, largest first, like get_components'''
+        def compute():
+            if self.is_compact():
+                return [[self.graph.nodes[i] for i in c] for c in self.component_indices()]
+            return get_components(self.graph)
+        return self._memoized('components', compute)
+
+    def LCC(self):
+        '''the subgraph of the largest connected component, like get_LCC'''
+        def compute():
+            if self.is_compact():
+                return self.graph.subgraph(self.component_indices()[0]) if self.graph.number_of_nodes() else self.graph
+            cc = self.components()
+            return self.graph.subgraph(cc[0]) if cc else None
+        return self._memoized('LCC', compute)
+
+    def path_lengths(self):
+        '''histogram of the lengths of the shortest paths between the nodes of the LCC,
+        counting each pair both ways, from one sweep of breadth first searches'''
+        def compute():
+            H = self.LCC()
+            if H is None:
+                return np.zeros(1, dtype=np.int64)
+            return path_lengths.path_length_histogram(H, self.jobs)
+        return self._memoized('path_lengths', compute)
+
+    def path_estimates(self):
+        '''bounds of the diameter of the LCC and its average shortest path estimated
+        from a sample of sources, as set with path_lengths.set_approximation'''
+        def compute():
+            H = self.LCC()
+            return path_lengths.estimate_paths(H if H is not None else nx.Graph(), self.jobs)
+        return self._memoized('path_estimates', compute)
+
+    def shortest_paths(self):
+        '''runs the exact sweep of shortest paths of the LCC, or its estimates if they were chosen'''
+        if path_lengths.is_approximate():
+            return self.path_estimates()
+        return self.path_lengths()
+
+    def degrees(self):
+        '''dictionary of the degree of each node'''
+        return self._memoized('degrees', lambda: node_degree_dict(self.graph))
+
+    def triangles_and_degrees(self):
+        '''the number of triangles through each node and its number of neighbours
+        other than itself, as arrays for a CompactGraph and as dictionaries for
+        a networkx graph'''
+        def compute():
+            if self.is_compact():
+                return node_triangles(self.graph), self.graph.degrees()
+            return networkx_triangles_and_degrees(self.graph)
+        return self._memoized('triangles', compute)
+
+    def clustering(self):
+        '''dictionary of the clustering coefficient of each node, as nx.clustering'''
+        def compute():
+            triangles, degrees = self.triangles_and_degrees()
+            if self.is_compact():
+                possible = degrees*(degrees-1)/2.0
+                values = np.where(degrees > 1, triangles/np.maximum(possible, 1), 0)
+                return dict(zip(self.graph.nodes, values.tolist()))
+            return {n:(0.0 if triangles[n] == 0 else 2*triangles[n]/float(degrees[n]*(degrees[n]-1))) for n in triangles}
+        return self._memoized('clustering', compute)
+
+    def betweenness(self):
+        '''dictionary of the betweenness centrality of each node, found on the mapped
+        arrays of a MappedGraph instead of a networkx copy'''
+        def compute():
+            if self.is_mapped():
+                return betweenness.betweenness_centrality(self.graph, ordered=False)
+            return betweenness.betweenness_centrality(self.networkx())
+        return self._memoized('betweenness', compute)
+
+
+def measurements(G):
+    '''returns the Measurements of G, or G itself if it is already one'''
+    if isinstance(G, Measurements):
+        return G
+    return Measurements(G)
+
+def node_degree_dict(G):
+    if is_compact(G):
+        return dict(zip(G.nodes, G.degrees(selfloops=True).tolist()))
+    return G.degree()
+
+def networkx_triangles_and_degrees(G):
+    '''returns dictionaries of the number of triangles through each node of a networkx
+    graph and of its number of neighbours other than itself, found in one pass as
+    nx.triangles, nx.clustering and nx.transitivity do'''
+    triangles = {}
+    degrees = {}
+    for n,nbrs in G.adjacency_iter():
+        ns = set(nbrs) - set([n])
+        closed = 0
+        for m in ns:
+            closed += len(ns.intersection(set(G[m]) - set([m])))
+        triangles[n] = closed//2
+        degrees[n] = len(ns)
+    return triangles, degrees
+
+def is_compact(G):
+    return isinstance(G, CompactGraph)
+
+def as_networkx(G):
+    '''measures without a compact version run on a networkx copy of the graph'''
+    if is_compact(G):
+        return G.to_networkx()
+    return G
+
+def as_backend(G, backend):
+    '''returns G as a graph of the given backend, networkx or compact (in memory or mapped)'''
+    if backend in ['compact','mapped']:
+        return as_compact(G)
+    return as_networkx(G)
+
+def node_triangles(G):
+    '''returns the number of triangles through each node of a CompactGraph'''
+    A = G.to_sparse()
+    return np.asarray((A*A).multiply(A).sum(axis=1)).ravel()/2.0
+
+
 ### Ecological measures
 
 
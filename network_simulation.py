@@ -13,6 +13,9 @@ import argparse
 import numpy as np
 import prettyplotlib as ppl
 import math
+import heapq
+import threading
+import Queue
 import powerlaw 
 from decimal import Decimal
 
@@ -27,20 +30,45 @@ from prettyplotlib import brewer2mpl
 # sys.path.insert(0, _root_dir)
 
 import networkx as nx
-from make_network import import_graph
+from make_network import import_graph, import_columns, build_graph, load_table, find_table, forget_parsed
 import network_measures as nm
+import percolation
+import parallel
+import cascades
+import simulation_cache
+import null_models
+import betweenness
+import path_lengths
+import graph_cache
+import graph_store
+from compact_graph import as_compact
 
 RANDSEED = 2
 np.random.seed(RANDSEED)
 DPI = 200 #resolution of plot #low for testing
 RAND_NAME = 'random_network_size_of_'
 SCALE_NAME = 'scalefree_network_size_of_'
+NULL_NAME = 'null_model_of_'
 FILTER_NON_OTUS = True
 MARKER_SIZE = 200
 NUM_BINS = 30.0
 
 NOT_A_NODE_VALUE = 'NA'
 
+ADAPTIVE_FRACTION = 0.01 #by default adaptive attacks recalculate the measure after removing this fraction of nodes
+BC_PIVOTS = 500 #number of pivot nodes used to approximate betweenness in adaptive attacks
+DEGREE_MEASURES = ['node_degrees','degree_centrality','degree']
+ENSEMBLE_QUANTILES = [5,95] #percentiles of the random attacks drawn as a band around their mean
+BAND_ALPHA = 0.25
+SIMULATION_FOLDER = 'simulations'
+CASCADE_LOAD = 'betweenness' #load carried by nodes in cascading failures, betweenness or degree
+CASCADE_EXACT_LOAD_NODES = 2000 #larger networks get betweenness loads estimated from BC_PIVOTS pivots, unless a betweenness accuracy was set
+ATTACK_UNITS = {'node':'nodes', 'edge':'edges', 'cascade':'attacked nodes'}
+ROBUSTNESS_REPLICATES = 100 #number of random attacks summarized in the table of network measures
+NULL_MODEL = 'swap' #degree preserving null model: swap or configuration
+PREFETCH_NETWORKS = 1 #graphs of a network and type of edges made ahead by a background thread while streaming through them
+NETWORKS_IN_FLIGHT = 2 #groups of curves (of a network or of its null models) simulated at once over the pool of jobs
+
 TAXONOMY = ["kingdom","phylum","class","order","family","genus","species","subspecies","subsubspecies"]
 
 INDVAL_P_CUTOFF = 0.01
@@ -77,9 +105,31 @@ STRUCTURE_METRICS = [nm.number_of_nodes,
 					nm.fraction_of_possible_triangles,
 					nm.size_of_largest_clique,
 					nm.average_path_on_largest_connected_component,
+					nm.path_length_histogram_of_largest_connected_component,
 					nm.degree_assortativity,
 					nm.correlation_of_degree_and_betweenness_centrality,
 					]
+PATH_METRICS = [nm.diameter_of_largest_connected_component,
+				nm.average_path_on_largest_connected_component,
+				nm.path_length_histogram_of_largest_connected_component,
+				] #metrics read from the sweep of shortest paths on the LCC
+COMPONENT_METRICS = [nm.number_of_components,
+				nm.size_of_big_components,
+				nm.number_of_nodes_of_largest_connected_component,
+				nm.number_of_edges_of_largest_connected_component,
+				] #metrics read from the connected components
+TRIANGLE_METRICS = [nm.global_clustering_coefficient,
+				nm.fraction_of_possible_triangles,
+				] #metrics read from the triangles through each node
+BETWEENNESS_METRICS = [nm.correlation_of_degree_and_betweenness_centrality,
+				] #metrics read from the betweenness centrality of each node
+#Measurements read by several metrics, found once before the metrics are spread over processes
+SHARED_MEASUREMENTS = [(COMPONENT_METRICS+PATH_METRICS, 'components', 'connected components'),
+				(COMPONENT_METRICS+PATH_METRICS, 'LCC', 'largest connected component'),
+				(TRIANGLE_METRICS, 'triangles_and_degrees', 'triangles through each node'),
+				(PATH_METRICS, 'shortest_paths', 'shortest paths of the largest connected component'),
+				(BETWEENNESS_METRICS, 'betweenness', 'betweenness centrality of each node'),
+				]
 
 INPUT_METRICS = []
 				# nm.richness,
@@ -90,7 +140,7 @@ OTU_METRICS = [#nm.correlation_of_degree_and_depth,
 			#	nm.compute_modularity_horizon,
 				]
 MEASURES = [nm.node_degrees,
-			nx.betweenness_centrality, 
+			betweenness.betweenness_centrality, 
 			nx.clustering, 
 			nm.in_largest_connected_component,
 			nm.node_modularity,
@@ -117,40 +167,98 @@ MODULE_OTU_METRICS = []
 
 
 
-def get_graph(nodeFile, edgeFile,edgetype):
-	'''imports the node and edge file and makes the graph'''
-	G = import_graph(nodeFile,edgeFile,edgetype,FILTER_NON_OTUS)
+def get_graph(nodeFile, edgeFile,edgetype, backend='networkx'):
+	'''imports the node and edge file and makes the graph, a networkx graph or a CompactGraph
+	depending on the backend. The parsed and filtered network is cached in binary form and
+	reused while the files are unchanged. With the mapped backend the network is converted
+	to a graph store instead and its arrays are mapped from disk.'''
+	if backend == 'mapped':
+		return graph_store.open_graph(nodeFile,edgeFile,edgetype,FILTER_NON_OTUS)
+	columns = graph_cache.load_columns(nodeFile,edgeFile,edgetype,FILTER_NON_OTUS)
+	if columns is None:
+		columns = import_columns(nodeFile,edgeFile,edgetype,FILTER_NON_OTUS)
+		graph_cache.save_columns(columns,nodeFile,edgeFile,edgetype,FILTER_NON_OTUS)
+	if backend == 'compact':
+		return graph_cache.compact_columns(columns)
+	G = build_graph(*columns)
 	return G
 
-def get_multiple_graphs(networks, path, edgetype, add_random, add_scalefree, LCC=False):
+def get_network_files(path, netName):
+	'''returns the node and edge files of a network, which may be compressed'''
+	return [find_table(os.path.join(path,netName+'_nodes.txt')), find_table(os.path.join(path,netName+'_edges.txt'))]
+
+def get_multiple_graphs(networks, path, edgetype, add_random, add_scalefree, LCC=False, backend='networkx'):
 	'''makes multiple graphs from names of networks and a file path'''
 	graphs = {}
 	for netName in networks:
-		nodeFile = os.path.join(path,netName+'_nodes.txt')
-		edgeFile = os.path.join(path,netName+'_edges.txt')
-		G = get_graph(nodeFile,edgeFile,edgetype)
+		graphs.update(make_graphs(netName, path, edgetype, add_random, add_scalefree, LCC, backend))
+	return graphs
+
+def iter_multiple_graphs(networks, path, edgetypes, add_random, add_scalefree, LCC=False, backend='networkx', prefetch=PREFETCH_NETWORKS):
+	'''Yields the (edgetype, name, graph) triples of the graphs of get_multiple_graphs
+	for each type of edges in edgetypes, one network at a time, so only the networks
+	being used are held in memory. The graphs of a network are made for every type of
+	edges in turn from one parse of its files, which is dropped before the next network,
+	and its random and scalefree graphs come right after it. A background thread makes
+	the graphs of the next prefetch networks and types of edges while the current ones
+	are used, or none if prefetch is 0.'''
+	def stream_graphs():
+		for netName in networks:
+			for edgetype in edgetypes:
+				yield edgetype, make_graphs(netName, path, edgetype, add_random, add_scalefree, LCC, backend)
+			forget_parsed(*get_network_files(path, netName))
+	if prefetch <= 0:
+		for edgetype,graphs in stream_graphs():
+			for name,G in graphs:
+				yield edgetype,name,G
+		return
+	made = Queue.Queue(maxsize=prefetch)
+	def make_all():
+		try:
+			for graphs in stream_graphs():
+				made.put((graphs, None))
+		except Exception:
+			made.put((None, sys.exc_info()))
+	loader = threading.Thread(target=make_all)
+	loader.daemon = True #the thread is left waiting if the consumer stops early
+	loader.start()
+	for k in range(len(networks)*len(edgetypes)):
+		graphs, error = made.get()
+		if error is not None:
+			raise error[0], error[1], error[2]
+		edgetype, graphs = graphs
+		for name,G in graphs:
+			yield edgetype,name,G
+		graphs = None
+
+def make_graphs(netName, path, edgetype, add_random, add_scalefree, LCC=False, backend='networkx'):
+	'''makes the graph of a network and the random and scalefree graphs of its size if asked,
+	and returns them as a list of (name, graph) pairs'''
+	graphs = []
+	nodeFile,edgeFile = get_network_files(path, netName)
+	G = get_graph(nodeFile,edgeFile,edgetype,backend)
+	if LCC:
+		G = nm.get_LCC(G)
+		print "keeping only connected component"
+	graphs.append((netName, G))
+	print 'Made the networkx graph {0} with N = {1}, E = {2}.'.format(netName,G.number_of_nodes(),G.number_of_edges())
+	
+	##adding random graph for comparaison
+	if add_random:
+		M = nx.number_of_edges(G)
+		N = nx.number_of_nodes(G)
+		H = nx.gnm_random_graph(N,M,seed=RANDSEED)
 		if LCC:
-			G = nm.get_LCC(G)
-			print "keeping only connected component"
-		graphs[netName] = G
-		print 'Made the networkx graph {0} with N = {1}, E = {2}.'.format(netName,G.number_of_nodes(),G.number_of_edges())
-		
-		##adding random graph for comparaison
-		if add_random:
-			M = nx.number_of_edges(G)
-			N = nx.number_of_nodes(G)
-			H = nx.gnm_random_graph(N,M,seed=RANDSEED)
-			if LCC:
-				H = nm.get_LCC(H)
-			graphs[RAND_NAME+netName] = H
-		if add_scalefree:
-			N = nx.number_of_nodes(G)
-			H = nx.scale_free_graph(N,seed=RANDSEED)
-			UH = H.to_undirected()
-			UH = nx.Graph(UH)
-			if LCC:
-				UH = nm.get_LCC(UH)		
-			graphs[SCALE_NAME+netName] = UH
+			H = nm.get_LCC(H)
+		graphs.append((RAND_NAME+netName, nm.as_backend(H, backend)))
+	if add_scalefree:
+		N = nx.number_of_nodes(G)
+		H = nx.scale_free_graph(N,seed=RANDSEED)
+		UH = H.to_undirected()
+		UH = nx.Graph(UH)
+		if LCC:
+			UH = nm.get_LCC(UH)		
+		graphs.append((SCALE_NAME+netName, nm.as_backend(UH, backend)))
 	return graphs
 
 def get_network_fullnames(networkNames):
@@ -165,7 +273,7 @@ def get_network_fullnames(networkNames):
 	return networks,treatments
 
 def load_samples_info(samplesFile):
-	samplesTable = np.loadtxt(samplesFile, comments=None, delimiter='\t', dtype='S1000')
+	samplesTable = load_table(samplesFile, comments=None, delimiter='\t', dtype='S1000')
 	return samplesTable
 
 def get_info_per_samples(samplesFile, samples, feature):
@@ -203,11 +311,11 @@ def make_OTU_feature_table(net_path, networkNames, inputFolder, inputFileEnd, in
 
 	otuTable = {}
 	for n in networks:
-		otuTable[n] = np.loadtxt(os.path.join(inputFolder,n.replace('BAC_','')+inputFileEnd), dtype='S1000')
+		otuTable[n] = load_table(os.path.join(inputFolder,n.replace('BAC_','')+inputFileEnd), dtype='S1000')
 
 	indTable = {}
 	for n in networkNames.keys():
-		indTable[n] = np.loadtxt(os.path.join(indvalFolder,n.replace('BAC_','')+indvalFileEnd), dtype='S1000')
+		indTable[n] = load_table(os.path.join(indvalFolder,n.replace('BAC_','')+indvalFileEnd), dtype='S1000')
 
 	header = ['OTUs','Abundance','IndforCluster']
 	headerStart = len(header)
@@ -215,6 +323,10 @@ def make_OTU_feature_table(net_path, networkNames, inputFolder, inputFileEnd, in
 		header.append(f+ ' avg')
 		header.append(f+ ' std')
 	header.extend([m.__name__.replace('_',' ').capitalize() for m in MEASURES])
+	#approximate betweenness is recorded with its accuracy so the ranking of central OTUs can be checked
+	accuracyColumns = 1 if betweenness.is_approximate() and betweenness.betweenness_centrality in MEASURES else 0
+	if accuracyColumns:
+		header.append(betweenness.betweenness_centrality.__name__.replace('_',' ').capitalize()+' accuracy')
 	header.extend(TAXONOMY)
 	tax_index = len(TAXONOMY)
 
@@ -223,7 +335,7 @@ def make_OTU_feature_table(net_path, networkNames, inputFolder, inputFileEnd, in
 			abundances = otuTable[location+'_'+t]
 			sampleNames = abundances[0,1:-1]
 			sampleCounts = abundances[1:-1,1:-1].astype(np.float).sum(axis=0)
-			featureTable = np.zeros(shape=(abundances.shape[0]-1,headerStart+len(features)*2+len(MEASURES)+tax_index), dtype='S1000')
+			featureTable = np.zeros(shape=(abundances.shape[0]-1,headerStart+len(features)*2+len(MEASURES)+accuracyColumns+tax_index), dtype='S1000')
 			featureTable[0,:] = np.array(header)
 			for r,row in enumerate(abundances[1:-1,]):
 				otu = row[0]
@@ -267,6 +379,8 @@ def make_OTU_feature_table(net_path, networkNames, inputFolder, inputFileEnd, in
 					else:
 						measureValue = NOT_A_NODE_VALUE				
 					featureTable[r+1][col]=measureValue
+			if accuracyColumns:
+				featureTable[1:,column_bias+len(MEASURES)] = betweenness.accuracy(graphs[location+'_'+t].number_of_nodes())
 
 			fileName = featureFile+'_{0}_{1}_{2}_factor{3}.txt'.format(edgetype,location,t,factor)
 			tableFile = os.path.join(path,fileName)
@@ -388,7 +502,7 @@ def make_ecological_table(net_path, networkNames, filePath, edgetype, inputFolde
 
 	otuTable = {}
 	for n in networks:
-		otuTable[n] = np.loadtxt(os.path.join(inputFolder,n.replace('BAC_','')+inputFileEnd), dtype='S1000')
+		otuTable[n] = load_table(os.path.join(inputFolder,n.replace('BAC_','')+inputFileEnd), dtype='S1000')
 
 	table = np.zeros(shape=(len(INPUT_METRICS)+2, len(networkNames)*len(treatments)+1), dtype='S1000')
 	i,j = 0,1 # i is row, j is column
@@ -418,7 +532,7 @@ def get_taxonomic_levels(featurePath,featureFile,location,treatments,tax_level,n
 	edgetype = 'pos'
 	for t in treatments:
 		featureTableFile = os.path.join(featurePath,featureFile+'_{0}_{1}_{2}.txt'.format(edgetype,location,t))
-		featureTable = np.loadtxt(featureTableFile,delimiter='\t', dtype='S1000')
+		featureTable = load_table(featureTableFile,delimiter='\t', dtype='S1000')
 		#get tax levels of only levels present in network
 		netfeatureTable = featureTable[np.where(featureTable[:,netcol]!=NOT_A_NODE_VALUE)]
 		taxcol = np.where(netfeatureTable[0,:]==tax_level)[0][0]
@@ -439,7 +553,7 @@ def calculate_taxonomic_representation(net_path, networkNames, figurePath, featu
 		alltaxa = {}
 		for t in treatments:
 			featureTableFile = os.path.join(featurePath,featureFile+'_{0}_{1}_{2}.txt'.format(edgetype,location,t))
-			featureTable = np.loadtxt(featureTableFile,delimiter='\t', dtype='S1000')
+			featureTable = load_table(featureTableFile,delimiter='\t', dtype='S1000')
 			centcol = np.where(featureTable[0,:]==colName)[0][0]
 			taxcol = np.where(featureTable[0,:]==tax_level)[0][0]
 			print featureTable.shape
@@ -544,7 +658,7 @@ def plot_venn_diagram(net_path, networkNames, figurePath, featurePath, featureFi
 			taxaSeen[location] = []
 			for t in treatments:
 				featureTableFile = os.path.join(featurePath,featureFile+'_{0}_{1}_{2}.txt'.format(edgetype,location,t))
-				featureTable = np.loadtxt(featureTableFile,delimiter='\t', dtype='S1000')
+				featureTable = load_table(featureTableFile,delimiter='\t', dtype='S1000')
 				centcol = np.where(featureTable[0,:]==colName)[0][0]
 				taxcol = np.where(featureTable[0,:]==tax_level)[0][0]
 				nodes = featureTable[np.where(featureTable[:,centcol]!=NOT_A_NODE_VALUE)][1:,0]
@@ -637,7 +751,7 @@ def plot_venn_otus_diagram(net_path, networkNames, figurePath, featurePath, feat
 		#centralities = {}
 		for t in treatments:
 			featureTableFile = os.path.join(featurePath,featureFile+'_{0}_{1}_{2}.txt'.format(edgetype,location,t))
-			featureTable = np.loadtxt(featureTableFile,delimiter='\t', dtype='S1000')
+			featureTable = load_table(featureTableFile,delimiter='\t', dtype='S1000')
 			centcol = np.where(featureTable[0,:]==colName)[0][0]
 			nodes = featureTable[np.where(featureTable[:,centcol]!=NOT_A_NODE_VALUE)][1:,0]
 			taxcol = 0
@@ -700,7 +814,7 @@ def centrality_plot(net_path, networkNames, figurePath, featurePath, featureFile
 		centralities = {}
 		for t in treatments:
 			featureTableFile = os.path.join(featurePath,featureFile+'_{0}_{1}_{2}.txt'.format(edgetype,location,t))
-			featureTable = np.loadtxt(featureTableFile,delimiter='\t', dtype='S1000')
+			featureTable = load_table(featureTableFile,delimiter='\t', dtype='S1000')
 			centcol = np.where(featureTable[0,:]==colName)[0][0]
 			taxcol = np.where(featureTable[0,:]==tax_level)[0][0]
 			nodes = featureTable[np.where(featureTable[:,centcol]!=NOT_A_NODE_VALUE)][1:,0]
@@ -767,7 +881,7 @@ def keystone_quantitative_feature_plot(net_path, networkNames, figurePath, featu
 			for i,t in enumerate(treatments):
 				featureValues.append([])
 				featureTableFile = os.path.join(featurePath,featureFile+'_{0}_{1}_{2}.txt'.format(edgetype,location,t))
-				featureTable = np.loadtxt(featureTableFile,delimiter='\t', dtype='S1000')
+				featureTable = load_table(featureTableFile,delimiter='\t', dtype='S1000')
 				centcol = np.where(featureTable[0,:]==colName)[0][0]
 				nodes = featureTable[np.where(featureTable[:,centcol]!=NOT_A_NODE_VALUE)][1:,0]
 				featcol = np.where(featureTable[0,:]==f)[0][0]
@@ -910,7 +1024,7 @@ def plot_scatter_bc(net_path, networkNames, figurePath, featurePath, featureFile
 					iterable.append((axes[j],r,c))
 		for ax,location,t in iterable:
 			featureTableFile = os.path.join(featurePath,featureFile+'_{0}_{1}_{2}.txt'.format(edgetype,location,t))
-			featureTable = np.loadtxt(featureTableFile,delimiter='\t', dtype='S1000')
+			featureTable = load_table(featureTableFile,delimiter='\t', dtype='S1000')
 			notBC = []
 			BC = []
 			atCol = np.where(featureTable[0,:]==attribute)[0][0]
@@ -1112,7 +1226,7 @@ def module_structure(net_path, networkNames, filePath, edgetype, inputFolder, in
 	for n in networks:
 		#otuTable[n] = np.loadtxt(os.path.join(inputFolder,n.replace('BAC_','')+inputFileEnd), dtype='S1000')
 		mods = nm.get_module_graphs(graphs[n],factor=factor)
-		modules[n] = mods
+		modules[n] = [nm.Measurements(mod) for mod in mods]
 		number_modules[n] = len(mods)
 	print number_modules
 	print sum(number_modules.values())
@@ -1146,9 +1260,9 @@ def module_structure(net_path, networkNames, filePath, edgetype, inputFolder, in
 					i+=1
 					values = []
 					featureTableFile = os.path.join(featurePath,featureFile+'_{0}_{1}_{2}.txt'.format(edgetype,location,t))
-					featureTable = np.loadtxt(featureTableFile,delimiter='\t', dtype='S1000')
+					featureTable = load_table(featureTableFile,delimiter='\t', dtype='S1000')
 					for mod in mods:
-						values.append(om(mod,featureTable))
+						values.append(om(mod.graph,featureTable))
 					table[i,j:j+number_mods]=values
 				j+= max(1,number_mods)
 				i=0
@@ -1161,133 +1275,622 @@ def module_structure(net_path, networkNames, filePath, edgetype, inputFolder, in
 
 
 
-def network_structure(net_path, networkNames, filePath, edgetype, inputFolder, inputFileEnd,featurePath, featureFile):
+def robustness_summaries(G, replicates=ROBUSTNESS_REPLICATES, jobs=1, seed=RANDSEED):
+	'''runs an ensemble of random attacks on the graph and returns an array with
+	the R-index, critical fraction and peak of the avg size of smaller components
+	of each replicate, computed while the attacks run instead of from full curves'''
+	C = as_compact(G)
+	indptr, indices = C.adjacency_lists()
+	removal=int(C.number_of_nodes())-1 #can't remove last node, otherwise there is nothing to measure!
+	seeds = np.random.RandomState(seed).randint(0, 2**31-1, size=replicates)
+	return percolation.random_summary_ensemble(indptr, indices, removal, list(seeds), jobs)
+
+def robustness_index_of_random_attacks(summaries):
+	return nm.format_correlation(np.mean(summaries[:,0]), np.std(summaries[:,0]))
+
+def critical_fraction_of_random_attacks(summaries):
+	return nm.format_correlation(np.mean(summaries[:,1]), np.std(summaries[:,1]))
+
+def peak_size_of_small_components_in_random_attacks(summaries):
+	return nm.format_correlation(np.mean(summaries[:,2]), np.std(summaries[:,2]))
+
+ROBUSTNESS_METRICS = [robustness_index_of_random_attacks,
+					critical_fraction_of_random_attacks,
+					peak_size_of_small_components_in_random_attacks,
+					]
+
+def structure_task(shared, netName, k):
+	'''calculates the kth structure metric of a network, or runs its random
+	attacks for the robustness metrics if k is past the last structure metric.
+	The metrics share the Measurements of the network. Each process has its
+	own copy of them, so those read by several metrics are found before the
+	tasks are spread (see SHARED_MEASUREMENTS) and the others are only kept
+	for the next metrics calculated in the same process.'''
+	G = shared['graphs'][netName]
+	if k < len(STRUCTURE_METRICS):
+		print "For network {0} calculating metric {1}".format(netName,STRUCTURE_METRICS[k].__name__)
+		return STRUCTURE_METRICS[k](shared['measurements'][netName])
+	print "For network {0} running {1} random attacks".format(netName,shared['replicates'])
+	return robustness_summaries(G, shared['replicates'], shared['jobs'])
+
+def null_structure_task(shared, netName, seeds):
+	'''calculates the structure metrics of the null models of a network made
+	with each seed and runs random attacks on them for the robustness metrics'''
+	print "For network {0} measuring {1} {2} null models".format(netName,len(seeds),shared['nullModel'])
+	rows = []
+	for seed,C in zip(seeds, null_models.null_ensemble(shared['graphs'][netName], seeds, shared['nullModel'])):
+		M = nm.Measurements(nm.as_backend(C, shared['backend']))
+		values = [sm(M) for sm in STRUCTURE_METRICS]
+		summaries = robustness_summaries(C, shared['attacks'], 1, seed) if ROBUSTNESS_METRICS else None
+		rows.append((values, summaries))
+	return rows
+
+def summarize_null_values(values):
+	'''returns the mean and standard deviation of a structure metric over the null models'''
+	try:
+		numbers = [float(str(v).split(' ')[0]) for v in values]
+	except ValueError:
+		return NOT_A_NODE_VALUE #metrics that aren't a single number, like the sizes of components
+	return nm.format_correlation(np.mean(numbers), np.std(numbers))
+
+def network_structure(net_path, networkNames, filePaths, edgetypes, inputFolder, inputFileEnd,featurePath, featureFile, replicates=ROBUSTNESS_REPLICATES, jobs=1, nullReplicates=0, nullModel=NULL_MODEL, backend='networkx'):
+	'''measures the networks built with each type of edges in edgetypes and saves
+	the table of each type of edges in the file given for it in filePaths'''
 	networks,treatments = get_network_fullnames(networkNames)
 	print networks, treatments
-	graphs = get_multiple_graphs(networks,net_path,edgetype, False, False)
-	#sys.exit()
-	otuTable = {}
-	if INPUT_METRICS:
-		for n in networks:
-			otuTable[n] = np.loadtxt(os.path.join(inputFolder,n.replace('BAC_','')+inputFileEnd), dtype='S1000')
 
 	if treatments != []:
-		table = np.zeros(shape=(len(INPUT_METRICS)+len(STRUCTURE_METRICS)+len(OTU_METRICS)+2, len(networkNames)*len(treatments)+1), dtype='S1000')
-		i,j = 0,1 # i is row, j is column
-		column = ['Zones','Treatments']
-		column.extend([sm.__name__.replace('_',' ').capitalize() for sm in INPUT_METRICS])
-		column.extend([sm.__name__.replace('_',' ').capitalize() for sm in STRUCTURE_METRICS])
-		column.extend([om.__name__.replace('_',' ').capitalize() for om in OTU_METRICS])
-		table[:,0]=column
-		for location,treatments in networkNames.iteritems():
-			table[i,j]=location
-			for t in treatments:
+		#networks are measured one at a time as they are streamed in, for every type of
+		#edges from one parse of their files, so only the graph and tables of the network
+		#being measured are held in memory. The pool of jobs only spreads the metrics of
+		#one network at a time: with fewer metrics than jobs, some processes wait for the
+		#next network
+		zones = dict((location+'_'+t, (location,t)) for location,treatments in networkNames.iteritems() for t in treatments)
+		measured = dict((edgetype, {}) for edgetype in edgetypes)
+		nullMeasured = dict((edgetype, {}) for edgetype in edgetypes)
+		seeds = null_models.null_seeds(nullReplicates, RANDSEED)
+		for edgetype,netName,G in iter_multiple_graphs(networks,net_path,edgetypes, False, False, backend=backend):
+			location,t = zones[netName]
+			if INPUT_METRICS:
+				S = load_table(os.path.join(inputFolder,netName.replace('BAC_','')+inputFileEnd), dtype='S1000')
+				for k,im in enumerate(INPUT_METRICS):
+					print "For input table from zone {0} treatment {1} measuring {2}".format(location,t,im.__name__)
+					measured[edgetype][(netName, 'input', k)] = im(S)
+				S = None
+
+			#structure metrics and robustness summaries, in parallel if there are several jobs
+			tasks = [(netName, k) for k in range(len(STRUCTURE_METRICS))]
+			if ROBUSTNESS_METRICS:
+				tasks.append((netName, len(STRUCTURE_METRICS)))
+			M = nm.Measurements(G, jobs)
+			#shared intermediate results are found once, the sweep of shortest paths and
+			#betweenness over all the jobs, before the metrics are spread over them
+			for metrics,measurement,description in SHARED_MEASUREMENTS:
+				if set(metrics) & set(STRUCTURE_METRICS):
+					print "For network {0} with {1} type of edges finding the {2}".format(netName,edgetype,description)
+					getattr(M, measurement)()
+			shared = {'graphs':{netName:G}, 'measurements':{netName:M}, 'replicates':replicates, 'jobs':jobs if len(tasks)==1 else 1}
+			measured[edgetype].update(zip(tasks, parallel.map_tasks(structure_task, tasks, jobs, shared)))
+
+			#the same measures on the degree preserving null models of the network
+			if nullReplicates:
+				nullTasks = [(netName, chunk) for chunk in null_models.split_seeds(seeds, jobs)]
+				#attacks are spread over the null models so there are about as many in total as for the network
+				shared = {'graphs':{netName:G}, 'nullModel':nullModel, 'attacks':int(np.ceil(replicates/float(nullReplicates))), 'backend':backend}
+				for rows in parallel.map_tasks(null_structure_task, nullTasks, jobs, shared):
+					nullMeasured[edgetype].setdefault(netName, []).extend(rows)
+
+			for k,om in enumerate(OTU_METRICS):
+				print "For network for zone {0} treatment {1} calculating metric {2}".format(location,t,om.__name__)
+				featureTableFile = os.path.join(featurePath,featureFile+'_{0}_{1}_{2}.txt'.format(edgetype,location,t))
+				featureTable = load_table(featureTableFile,delimiter='\t', dtype='S1000')
+				measured[edgetype][(netName, 'otu', k)] = om(G,featureTable)
+			G = None
+
+		for edgetype in edgetypes:
+			table = structure_table(networkNames, treatments, measured[edgetype], nullMeasured[edgetype], nullReplicates, nullModel)
+			np.savetxt(filePaths[edgetype], table, delimiter="\t", fmt='%s')
+	else:
+		print 'Can only do for multiple treatments. FIX ME'
+	return None
+
+def structure_table(networkNames, treatments, measured, nullMeasured, nullReplicates, nullModel):
+	'''returns the table of the measures of networks built with one type of edges'''
+	columnsPerNetwork = 2 if nullReplicates else 1 #each network is followed by the column of its null models
+	table = np.zeros(shape=(len(INPUT_METRICS)+len(STRUCTURE_METRICS)+len(ROBUSTNESS_METRICS)+len(OTU_METRICS)+2, len(networkNames)*len(treatments)*columnsPerNetwork+1), dtype='S1000')
+	i,j = 0,1 # i is row, j is column
+	column = ['Zones','Treatments']
+	column.extend([sm.__name__.replace('_',' ').capitalize() for sm in INPUT_METRICS])
+	column.extend([sm.__name__.replace('_',' ').capitalize() for sm in STRUCTURE_METRICS])
+	column.extend([rm.__name__.replace('_',' ').capitalize() for rm in ROBUSTNESS_METRICS])
+	column.extend([om.__name__.replace('_',' ').capitalize() for om in OTU_METRICS])
+	table[:,0]=column
+
+	for location,treatments in networkNames.iteritems():
+		table[i,j]=location
+		for t in treatments:
+			i+=1
+			table[i,j]=t
+			for k,im in enumerate(INPUT_METRICS):
+				i+=1
+				table[i,j]=measured[(location+'_'+t, 'input', k)]
+			for k,sm in enumerate(STRUCTURE_METRICS):
 				i+=1
-				table[i,j]=t
+				table[i,j]=measured[(location+'_'+t, k)]
+			for rm in ROBUSTNESS_METRICS:
+				i+=1
+				table[i,j]=rm(measured[(location+'_'+t, len(STRUCTURE_METRICS))])
+			for k,om in enumerate(OTU_METRICS):
+				i+=1
+				table[i,j]=measured[(location+'_'+t, 'otu', k)]
+			j+=1
+			i=0
+			if nullReplicates:
+				rows = nullMeasured[location+'_'+t]
+				i+=1
+				table[i,j]=t+' '+nullModel+' null model'
 				for im in INPUT_METRICS:
-					print "For input table from zone {0} treatment {1} measuring {2}".format(location,t,im.__name__)
 					i+=1
-					S = otuTable[location+'_'+t]
-					table[i,j]=im(S)
-				for sm in STRUCTURE_METRICS:
-					print "For network for zone {0} treatment {1} calculating metric {2}".format(location,t,sm.__name__)
+					table[i,j]=NOT_A_NODE_VALUE
+				for k,sm in enumerate(STRUCTURE_METRICS):
+					i+=1
+					table[i,j]=summarize_null_values([values[k] for values,summaries in rows])
+				for rm in ROBUSTNESS_METRICS:
 					i+=1
-					G = graphs[location+'_'+t]
-					table[i,j]=sm(G)
+					table[i,j]=rm(np.concatenate([summaries for values,summaries in rows]))
 				for om in OTU_METRICS:
-					print "For network for zone {0} treatment {1} calculating metric {2}".format(location,t,om.__name__)
 					i+=1
-					G = graphs[location+'_'+t]
-					featureTableFile = os.path.join(featurePath,featureFile+'_{0}_{1}_{2}.txt'.format(edgetype,location,t))
-					featureTable = np.loadtxt(featureTableFile,delimiter='\t', dtype='S1000')
-					table[i,j]=om(G,featureTable)
+					table[i,j]=NOT_A_NODE_VALUE
 				j+=1
 				i=0
-	else:
-		print 'Can only do for multiple treatments. FIX ME'
+	return table
 
-	np.savetxt(filePath, table, delimiter="\t", fmt='%s')
+def plot_multiple(net_path, networkNames, measures, plotby, fraction, figurePath, figureNames, edgetypes, add_random, add_scalefree, max_y, adaptive=False, interval=None, replicates=1, jobs=1, attack='node', cascadeLoad=CASCADE_LOAD, tolerance=cascades.TOLERANCE, nullReplicates=0, nullModel=NULL_MODEL):
+	'''simulates attacks on the networks built with each type of edges in edgetypes
+	and plots those of each type of edges in the figure given for it in figureNames'''
+	networks,treatments = get_network_fullnames(networkNames)
+	#the whole simulation is run once and saved, any fraction is then a slice of it
+	cacheFolder = os.path.join(figurePath, SIMULATION_FOLDER)
+	for netName in networks:
+		simulation_cache.invalidate(cacheFolder, get_network_files(net_path, netName))
+	data = dict((edgetype, {}) for edgetype in edgetypes)
+	keys = dict((edgetype, {}) for edgetype in edgetypes)
+	curveNames = {}
+	for name in ['random']+[m.__name__ for m in measures]:
+		if attack == 'cascade':
+			curveNames[name] = get_curve_name(name, 'cascade_'+cascadeLoad+'_'+str(tolerance), adaptive, interval, 1)
+		else:
+			curveNames[name] = get_curve_name(name, attack, adaptive, interval, replicates)
+	seeds = null_models.null_seeds(nullReplicates, RANDSEED)
+	nullSuffix = ':null_{0}_{1}'.format(nullModel,nullReplicates)
+	#networks whose curves are all saved are redrawn without reading their files
+	missing = []
+	loaded = set()
+	for netName in networks:
+		for edgetype in edgetypes:
+			curves = load_network_curves(cacheFolder, get_network_files(net_path, netName), netName, edgetype, add_random, add_scalefree, curveNames, keys[edgetype], nullSuffix if nullReplicates else None)
+			if curves is None:
+				if netName not in missing:
+					missing.append(netName)
+			else:
+				print 'Loaded simulation on {0} with {1} type of edges.'.format(netName,edgetype)
+				data[edgetype].update(curves)
+				loaded.add((edgetype, netName))
+	#the other networks are simulated as they are streamed in, for every type of edges from one
+	#parse of their files, and only their curves are kept. The curves of a few networks at a time
+	#are spread over one pool of jobs kept for the whole stream
+	ensembleSeeds = np.random.RandomState(RANDSEED).randint(0, 2**31-1, size=replicates).tolist()
+	def simulation_groups():
+		for edgetype,netName,G in iter_multiple_graphs(missing,net_path,edgetypes, add_random, add_scalefree, LCC=True):
+			sources = get_network_files(net_path, netName.replace(RAND_NAME,'').replace(SCALE_NAME,''))
+			if (edgetype, netName.replace(RAND_NAME,'').replace(SCALE_NAME,'')) in loaded:
+				continue
+			fingerprint = simulation_cache.graph_fingerprint(G)
+			simulation_cache.save_fingerprint(cacheFolder, sources, [edgetype, netName, 'LCC'], fingerprint)
+			data[edgetype][netName] = cached_curves(cacheFolder, netName, fingerprint, edgetype, curveNames, keys[edgetype])
+			names = [name for name in ['random']+[m.__name__ for m in measures] if name not in data[edgetype][netName]]
+			if not names:
+				print 'Loaded simulation on {0} with {1} type of edges.'.format(netName,edgetype)
+
+			#each missing curve is a task, and the random attacks of an ensemble are split in chunks of seeds
+			settings = {'attack':attack, 'adaptive':adaptive, 'interval':interval, 'replicates':replicates,
+						'jobs':1, 'cascadeLoad':cascadeLoad, 'tolerance':tolerance}
+			tasks = [(netName,name,None) for name in names]
+			if attack == 'node' and replicates > 1 and 'random' in names:
+				tasks = [task for task in tasks if task[1] != 'random']
+				tasks.extend([(netName,'random',chunk) for chunk in null_models.split_seeds(ensembleSeeds, jobs)])
+			#the compact graph, and betweenness over all the jobs, are found once here for all the curves.
+			#Only the compact graph is handed to the jobs, and each process attacks its networkx copy
+			#whose nodes are listed in the same order wherever it is made, so curves don't depend on jobs
+			C = as_compact(G)
+			G = C.to_networkx()
+			orders, loads = betweenness_attacks(G, C, measures, names, settings)
+			shared = {'compact':{netName:C}, 'measures':measures, 'settings':settings, 'orders':orders, 'loads':loads}
+			yield (edgetype, netName, sources, tasks), simulation_task, shared, tasks
+
+			#curves of each network are compared with their mean over its degree preserving null models
+			if nullReplicates and netName in networks:
+				data[edgetype][NULL_NAME+netName] = cached_curves(cacheFolder, NULL_NAME+netName, fingerprint, edgetype, curveNames, keys[edgetype], nullSuffix)
+				if len(data[edgetype][NULL_NAME+netName]) == len(measures)+1:
+					print 'Loaded simulation on null models of {0} with {1} type of edges.'.format(netName,edgetype)
+					continue
+				nullTasks = [(netName, chunk) for chunk in null_models.split_seeds(seeds, jobs)]
+				settings = dict(settings, nullModel=nullModel, replicates=1)
+				shared = {'compact':{netName:C}, 'measures':measures, 'settings':settings}
+				yield (edgetype, NULL_NAME+netName, sources, nullTasks), null_simulation_task, shared, nullTasks
+			G = C = shared = None
+
+	for (edgetype,graphName,sources,tasks),results in parallel.imap_groups(simulation_groups(), jobs, NETWORKS_IN_FLIGHT):
+		if graphName.startswith(NULL_NAME):
+			nullCurves = {}
+			for curves in results:
+				for name,values in curves.iteritems():
+					nullCurves.setdefault(name, []).extend(values)
+			for name,values in nullCurves.iteritems():
+				#null models made by the configuration model can lose a few edges, so curves are cut to the shortest
+				end = min([len(lc) for lc,sc in values])
+				lcs = np.array([lc[:end] for lc,sc in values])
+				scs = np.array([sc[:end] for lc,sc in values])
+				data[edgetype][graphName][name] = ensemble_curves(lcs, scs)
+				simulation_cache.save_curves(cacheFolder, keys[edgetype][(graphName,name)], data[edgetype][graphName][name], sources)
+			continue
+		ensemble = []
+		for (netName,name,chunk),curves in zip(tasks,results):
+			if chunk is None:
+				simulation_cache.save_curves(cacheFolder, keys[edgetype][(netName,name)], curves, sources)
+				data[edgetype][netName][name] = curves
+			else:
+				ensemble.append(curves)
+		if ensemble:
+			curves = ensemble_curves(np.concatenate([lcs for lcs,scs in ensemble]), np.concatenate([scs for lcs,scs in ensemble]))
+			simulation_cache.save_curves(cacheFolder, keys[edgetype][(graphName,'random')], curves, sources)
+			data[edgetype][graphName]['random'] = curves
+	for edgetype in edgetypes:
+		plot_simulations(data[edgetype], net_path, networkNames, treatments, measures, plotby, fraction, figurePath, figureNames[edgetype], edgetype, add_random, add_scalefree, max_y, adaptive, attack, cascadeLoad, tolerance, nullReplicates)
 	return None
 
-def plot_multiple(net_path, networkNames, measures, plotby, fraction, figurePath, figureName, edgetype, add_random, add_scalefree, max_y):
-
-	networks,treatments = get_network_fullnames(networkNames)
-	graphs = get_multiple_graphs(networks,net_path,edgetype, add_random, add_scalefree, LCC=True)
-	data = {}
-	for netName,G in graphs.iteritems():
-		print 'Running simulation on {0}.'.format(netName)
-		rand_lc_sizes, rand_sc_sizes = random_attack(G, fraction)
-		data[netName] = {'random':(rand_lc_sizes, rand_sc_sizes)}
-		for m in measures:
-			targ_lc_sizes, targ_sc_sizes = target_attack(G, m, fraction)
-			data[netName][m.__name__] = (targ_lc_sizes, targ_sc_sizes)
+def plot_simulations(data, net_path, networkNames, treatments, measures, plotby, fraction, figurePath, figureName, edgetype, add_random, add_scalefree, max_y, adaptive, attack, cascadeLoad, tolerance, nullReplicates):
+	'''plots the simulations on the networks built with one type of edges'''
+	data = slice_simulations(data, fraction, attack)
 	networkNamesPlot = networkNames.keys()
 	title = 'Robustness simulation on LCC of networks {0} with {1} type of edges'.format(','.join([n.replace('BAC_','') for n in networkNamesPlot]), edgetype)
+	if adaptive:
+		title = 'Adaptive r'+title[1:]
+	if attack == 'edge':
+		title = title.replace('Robustness simulation','Robustness simulation to edge removal')
+	elif attack == 'cascade':
+		title = title.replace('Robustness simulation','Cascading failure simulation ({0} load, tolerance {1})'.format(cascadeLoad,tolerance))
+	unit = ATTACK_UNITS[attack]
 	if add_random:
 		networkNamesPlot.extend([RAND_NAME+n for n in networkNames.keys()])
 	if add_scalefree:
 		networkNamesPlot.extend([SCALE_NAME+n for n in networkNames.keys()])
+	if nullReplicates:
+		networkNamesPlot.extend([NULL_NAME+n for n in networkNames.keys()])
 	if plotby == 'by_treatment':
-		multi_plot_robustness_by_treatment(data, figurePath, figureName, networkNamesPlot, treatments, measures, fraction, net_path, title, max_y)
+		multi_plot_robustness_by_treatment(data, figurePath, figureName, networkNamesPlot, treatments, measures, fraction, net_path, title, max_y, unit=unit)
 	elif plotby == 'by_measure':
-		multi_plot_robustness_by_measure(data, figurePath, figureName, networkNamesPlot, treatments, measures, fraction, net_path, title, max_y)
+		multi_plot_robustness_by_measure(data, figurePath, figureName, networkNamesPlot, treatments, measures, fraction, net_path, title, max_y, unit=unit)
 	return None
 
 
-def random_attack(G,fraction):
+def cached_curves(cacheFolder, netName, fingerprint, edgetype, curveNames, keys, suffix=''):
+	'''returns the saved curves of a graph given its fingerprint, by measure, and
+	records the key of every curve whether it was saved or not'''
+	curves = {}
+	for name,curveName in curveNames.iteritems():
+		keys[(netName,name)] = simulation_cache.cache_key(fingerprint, edgetype, curveName+suffix, 1, RANDSEED)
+		values = simulation_cache.load_curves(cacheFolder, keys[(netName,name)])
+		if values is not None:
+			curves[name] = values
+	return curves
+
+def load_network_curves(cacheFolder, sources, netName, edgetype, add_random, add_scalefree, curveNames, keys, nullSuffix=None):
+	'''Returns the saved curves of a network and of its random, scalefree and null
+	graphs by graph name, or None if any is missing. Graphs are found from the stamps
+	of the input files, so the network isn't read or built.'''
+	graphNames = [netName] + [prefix+netName for prefix,added in [(RAND_NAME,add_random), (SCALE_NAME,add_scalefree)] if added]
+	data = {}
+	for graphName in graphNames:
+		fingerprint = simulation_cache.load_fingerprint(cacheFolder, sources, [edgetype, graphName, 'LCC'])
+		if fingerprint is None:
+			return None
+		data[graphName] = cached_curves(cacheFolder, graphName, fingerprint, edgetype, curveNames, keys)
+		if nullSuffix is not None and graphName == netName:
+			data[NULL_NAME+netName] = cached_curves(cacheFolder, NULL_NAME+netName, fingerprint, edgetype, curveNames, keys, nullSuffix)
+	if any(len(curves) < len(curveNames) for curves in data.values()):
+		return None
+	return data
+
+def simulation_task(shared, netName, name, seeds=None):
+	'''simulates the curve of one measure (or of the random attack) on one network, or
+	if seeds are given returns the curves of the random attacks of an ensemble with them'''
+	C = shared['compact'][netName]
+	if seeds is not None:
+		print 'Running {0} random attacks on {1}.'.format(len(seeds),netName)
+		indptr, indices = C.adjacency_lists()
+		return percolation.random_attacks(indptr, indices, int(C.number_of_nodes())-1, seeds)
+	print 'Running simulation {0} on {1}.'.format(name,netName)
+	graphs = shared.setdefault('graphs', {}) #made once per process for all the curves of the network
+	if netName not in graphs:
+		graphs[netName] = C.to_networkx()
+	G = graphs[netName]
+	settings = shared['settings']
+	measures = [m for m in shared['measures'] if m.__name__ == name]
+	orders = dict((n,order) for n,order in shared['orders'].iteritems() if n == name)
+	curves = attack_graph(G, measures, settings, RANDSEED, name == 'random', orders, shared['loads'], C)
+	return curves[name]
+
+def betweenness_attacks(G, C, measures, names, settings):
+	'''Returns the removal orders of the node attacks by betweenness among the named
+	measures and the betweenness loads of cascades on the compact graph C, or None,
+	found in the calling process so that betweenness runs over its own pool of jobs'''
+	orders = {}
+	loads = None
+	if settings['attack'] == 'edge':
+		return orders, loads
+	for m in measures:
+		if m is betweenness.betweenness_centrality and m.__name__ in names:
+			print 'Ordering nodes by {0} on a graph of {1} nodes.'.format(m.__name__,G.number_of_nodes())
+			orders[m.__name__] = target_order(G, m, 1, settings['adaptive'], settings['interval'])
+	if settings['attack'] == 'cascade' and settings['cascadeLoad'] == 'betweenness' and names:
+		loads = get_loads(G, C, settings['cascadeLoad'])
+	return orders, loads
+
+def null_simulation_task(shared, netName, seeds):
+	'''simulates the curves of every measure on the null models of one network made with each seed'''
+	print 'Running simulations on {0} {1} null models of {2}.'.format(len(seeds),shared['settings']['nullModel'],netName)
+	settings = shared['settings']
+	curves = {}
+	for seed,C in zip(seeds, null_models.null_ensemble(shared['compact'][netName], seeds, settings['nullModel'])):
+		for name,values in attack_graph(C.to_networkx(), shared['measures'], settings, seed, True).iteritems():
+			curves.setdefault(name, []).append(values[:2])
+	return curves
+
+def attack_graph(G, measures, settings, seed, random, orders=None, loads=None, C=None):
+	'''runs the attack given in the settings for each measure, and the random attack if random is True.
+	Node removal orders, cascade loads and the compact copy C of the graph already made can be given.'''
+	if settings['attack'] == 'edge':
+		return attack_all_edge_measures(G, measures, 1, seed=seed, random=random, C=C)
+	elif settings['attack'] == 'cascade':
+		return attack_all_cascades(G, measures, 1, settings['cascadeLoad'], settings['tolerance'], settings['adaptive'], settings['interval'], seed=seed, random=random, orders=orders, loads=loads, C=C)
+	return attack_all_measures(G, measures, 1, settings['adaptive'], settings['interval'], settings['replicates'], settings['jobs'], seed=seed, random=random, orders=orders, C=C)
+
+def get_curve_name(measure, attack, adaptive, interval, replicates):
+	'''returns the name under which the curve of a measure is saved, given the attack settings'''
+	settings = [attack, measure]
+	if adaptive and measure != 'random':
+		settings.append('adaptive'+str(interval))
+	#only the random node attack runs an ensemble of replicates, edge attacks and cascades run one
+	if replicates > 1 and measure == 'random' and attack == 'node':
+		settings.append('replicates'+str(replicates))
+	if betweenness.is_approximate() and 'betweenness' in measure+attack:
+		settings.append('bc_'+betweenness.accuracy())
+	elif attack.startswith('cascade_betweenness'):
+		settings.append('load_pivots{0}_above{1}'.format(BC_PIVOTS, CASCADE_EXACT_LOAD_NODES))
+	return ':'.join(settings)
+
+def slice_simulations(data, fraction, attack):
+	'''truncates full simulations to the curves of the given fraction of removed nodes or edges'''
+	sliced = {}
+	for netName,curves in data.iteritems():
+		sliced[netName] = {}
+		for measure,values in curves.iteritems():
+			total = len(values[0])-1 #number of nodes or edges that could be removed
+			if attack == 'edge':
+				end = len(range(total)[:int(total*fraction)])+1
+			else:
+				#can't remove last node, otherwise there is nothing to measure!
+				end = len(range(total+1)[:int((total+1)*fraction)-1])+1
+			sliced[netName][measure] = tuple([list(v[:end]) for v in values[:2]])
+			if len(values)>2:
+				sliced[netName][measure] += (tuple([np.array(b[:end]) for b in values[2]]),)
+	return sliced
+
+def attack_all_measures(G, measures, fraction, adaptive=False, interval=None, replicates=1, jobs=1, seed=None, random=True, orders=None, C=None):
+	'''Runs the random attack and the targeted attack of every measure on
+	the same graph. All removal orders are computed up front, unless they are
+	given by measure name, and every curve is then evaluated against one
+	compact copy of the graph, C if it was already made. If a seed is given
+	the random order only depends on it, not on the global generator.'''
+	orders = dict(orders or {})
+	if random and replicates <= 1:
+		orders['random'] = random_order(G, seed)
+	for m in measures:
+		if m.__name__ not in orders:
+			orders[m.__name__] = target_order(G, m, fraction, adaptive, interval)
+
+	C = as_compact(G) if C is None else C
+	indptr, indices = C.adjacency_lists()
+	removal=int(C.number_of_nodes()*fraction)-1 #can't remove last node, otherwise there is nothing to measure!
+	data = {}
+	if random and replicates > 1:
+		data['random'] = random_attack_ensemble(C, fraction, replicates, jobs, seed if seed is not None else RANDSEED)
+	for name,order in orders.iteritems():
+		data[name] = percolation.percolation_curve(indptr, indices, C.node_indices(order), removal)
+	return data
+
+def attack_all_cascades(G, measures, fraction, cascadeLoad=CASCADE_LOAD, tolerance=cascades.TOLERANCE, adaptive=False, interval=None, seed=None, random=True, orders=None, loads=None, C=None):
+	'''Runs cascading failures set off by random attacks and by the targeted
+	attack of every measure. Each node carries a load (betweenness or degree)
+	that is passed on to its neighbours when it fails. Removal orders by
+	measure name, loads and the compact copy C of the graph already made can
+	be given.'''
+	orders = dict(orders or {})
+	if random:
+		orders['random'] = random_order(G, seed)
+	for m in measures:
+		if m.__name__ not in orders:
+			orders[m.__name__] = target_order(G, m, fraction, adaptive, interval)
+
+	C = as_compact(G) if C is None else C
+	indptr, indices = C.adjacency_lists()
+	if loads is None:
+		loads = get_loads(G, C, cascadeLoad)
+	removal=int(C.number_of_nodes()*fraction)-1 #can't remove last node, otherwise there is nothing to measure!
+	data = {}
+	for name,order in orders.iteritems():
+		data[name] = cascades.cascade_curve(indptr, indices, loads, tolerance, C.node_indices(order[:removal]))
+	return data
+
+def cascade_attack(G, measure, fraction, cascadeLoad=CASCADE_LOAD, tolerance=cascades.TOLERANCE):
+	'''Measure the size of the largest component of the graph as nodes
+	are attacked given the measure and overloaded nodes fail in cascade'''
+	return attack_all_cascades(G, [measure], fraction, cascadeLoad, tolerance, random=False)[measure.__name__]
+
+def get_loads(G, C, cascadeLoad):
+	'''returns the initial load of each node of the compact graph. Exact betweenness
+	costs far more than the cascades themselves on large networks, so it is estimated
+	from a sample of pivots there unless its accuracy was chosen'''
+	if cascadeLoad == 'degree':
+		return C.degrees().tolist()
+	pivots = None
+	if not betweenness.is_approximate() and C.number_of_nodes() > CASCADE_EXACT_LOAD_NODES:
+		pivots = BC_PIVOTS
+	values = betweenness.betweenness_centrality(G, normalized=False, pivots=pivots)
+	return [values[n] for n in C.nodes]
+
+def attack_all_edge_measures(G, measures, fraction, seed=None, random=True, C=None):
+	'''Runs the random edge attack and the targeted edge attack of every
+	edge measure on the same graph, as in attack_all_measures'''
+	orders = {}
+	if random:
+		orders['random'] = random_edge_order(G, seed)
+	for m in measures:
+		orders[m.__name__] = target_order(G, m, fraction)
+
+	C = as_compact(G) if C is None else C
+	sources, targets = C.edge_arrays()
+	sources, targets = sources.tolist(), targets.tolist()
+	removal=int(len(sources)*fraction)
+	data = {}
+	for name,order in orders.iteritems():
+		data[name] = percolation.bond_percolation_curve(C.number_of_nodes(), sources, targets, C.edge_indices(order), removal)
+	return data
+
+def random_edge_order(G, seed=None):
+	'''shuffles the edges of the graph with the global random generator
+	or with a generator of its own if a seed is given'''
+	edges = G.edges()
+	get_random_generator(seed).shuffle(edges)
+	return edges
+
+def random_edge_attack(G,fraction):
 	'''Measure the size of the largest component of the graph
-	as nodes are removed randomly'''
-	lc_sizes = [] #relative size of big component
-	sc_sizes = [] #avg size of smaller components
-	startSize = len(nm.get_components(G)[0])
-	lc_sizes.append(1)
-	sc_sizes.append(1)
-	H = G.copy()
-
-	nodes= G.nodes()
-	np.random.shuffle(nodes)
+	as edges are removed randomly'''
+	return percolation.edge_attack_curve(G, random_edge_order(G), fraction)
 
-	removal=int(len(nodes)*fraction)-1 #can't remove last node, otherwise there is nothing to measure!
+def target_edge_attack(G, measure, fraction):
+	'''Measure the size of the largest component of the graph
+	as edges are removed given an edge measure (edge betweenness
+	or edge clustering). The order IS NOT updated after each removal.'''
+	return percolation.edge_attack_curve(G, target_order(G, measure, fraction), fraction)
 
-	for n in nodes[:removal]:
-		H.remove_node(n)
-		components = nm.get_components(H)
-		lc_sizes.append(len(components[0])/float(startSize)) #measure the relative size change
-		if len(components)>1:
-			sc_sizes.append(np.mean([len(c) for c in components[1:]]))
-		else:
-			sc_sizes.append(1.0)
-	return lc_sizes,sc_sizes
+def random_order(G, seed=None):
+	'''shuffles the nodes of the graph with the global random generator
+	or with a generator of its own if a seed is given'''
+	nodes= G.nodes()
+	get_random_generator(seed).shuffle(nodes)
+	return nodes
 
+def get_random_generator(seed=None):
+	if seed is None:
+		return np.random
+	return np.random.RandomState(seed)
 
-def target_attack(G, measure,fraction):
+def random_attack(G,fraction):
+	'''Measure the size of the largest component of the graph
+	as nodes are removed randomly'''
+	return percolation.attack_curve(G, random_order(G), fraction)
+
+
+def random_attack_ensemble(G, fraction, replicates, jobs=1, seed=RANDSEED):
+	'''Runs the random attack for many random removal orders over a pool of
+	processes and returns the mean relative size of the largest component,
+	the mean avg size of smaller components and their quantile bands'''
+	C = as_compact(G)
+	indptr, indices = C.adjacency_lists()
+	removal=int(C.number_of_nodes()*fraction)-1 #can't remove last node, otherwise there is nothing to measure!
+	#each replicate gets its own seed, drawn from a generator independent of the global one
+	seeds = np.random.RandomState(seed).randint(0, 2**31-1, size=replicates)
+	lcs, scs = percolation.random_ensemble(indptr, indices, removal, list(seeds), jobs)
+	return ensemble_curves(lcs, scs)
+
+def ensemble_curves(lcs, scs):
+	'''takes arrays with one attack curve per row and returns their mean and quantile bands'''
+	low, high = ENSEMBLE_QUANTILES
+	bands = (np.percentile(lcs, low, axis=0), np.percentile(lcs, high, axis=0),
+			np.percentile(scs, low, axis=0), np.percentile(scs, high, axis=0))
+	return lcs.mean(axis=0).tolist(), scs.mean(axis=0).tolist(), bands
+
+
+def target_attack(G, measure,fraction, adaptive=False, interval=None):
 	'''Measure the size of the largest component of the graph
 	as nodes are removed given the measure (degree or centrality 
 	measure). The order of the nodes to be removed IS NOT updated
-	after each removal.
+	after each removal, unless adaptive is True.
 	'''
-	lc_sizes = [] #relative size of big component
-	sc_sizes = [] #avg size of smaller components
-	startSize = len(nm.get_components(G)[0])
-	lc_sizes.append(1)
-	sc_sizes.append(1)
-	H = G.copy()
+	return percolation.attack_curve(G, target_order(G, measure, fraction, adaptive, interval), fraction)
+
+def target_order(G, measure, fraction, adaptive=False, interval=None):
+	'''Returns the nodes (or edges for edge measures) sorted by
+	decreasing value of the measure'''
+	if adaptive:
+		return adaptive_order(G, measure, fraction, interval)
 
 	values = [(n,v) for n,v in measure(G).iteritems()]
 
 	values = sorted(values, key = lambda item: item[1], reverse = True)
 
-	removal=int(len(values)*fraction)-1 #can't remove last node in simulation, otherwise there is nothing to measure!
+	return zip(*values)[0]
 
-	for n in zip(*values)[0][:removal]:
-		H.remove_node(n)
-		components = nm.get_components(H)
-		lc_sizes.append(len(components[0])/float(startSize))  #measure the relative size change
-		if len(components)>1:
-			sc_sizes.append(np.mean([len(c) for c in components[1:]]))
-		else:
-			sc_sizes.append(1.0)
-	return lc_sizes,sc_sizes
+def adaptive_order(G, measure, fraction, interval=None):
+	'''Returns the order in which nodes are removed when the measure
+	is recalculated on the remaining graph. Degree is updated after
+	each removal, other measures are recalculated every interval removals.'''
+	removal=int(G.number_of_nodes()*fraction)-1 #can't remove last node in simulation, otherwise there is nothing to measure!
+	if measure.__name__ in DEGREE_MEASURES:
+		return adaptive_degree_order(G, removal)
+
+	if not interval:
+		interval = max(1, int(G.number_of_nodes()*ADAPTIVE_FRACTION))
+	H = G.copy()
+	order = []
+	while len(order) < removal:
+		values = [(n,v) for n,v in recalculate_measure(H, measure).iteritems()]
+		values = sorted(values, key = lambda item: item[1], reverse = True)
+		for n,v in values[:min(interval, removal-len(order))]:
+			order.append(n)
+			H.remove_node(n)
+	return order
+
+def adaptive_degree_order(G, removal):
+	'''Returns the order in which nodes are removed when always removing
+	the node of highest degree, updating the degrees of the neighbours
+	of each removed node instead of recalculating them.'''
+	degrees = G.degree()
+	heap = [(-d,n) for n,d in degrees.iteritems()]
+	heapq.heapify(heap)
+	removed = set()
+	order = []
+	while heap and len(order) < removal:
+		d,n = heapq.heappop(heap)
+		if n in removed or -d != degrees[n]:
+			continue #outdated entry
+		order.append(n)
+		removed.add(n)
+		for m in G.neighbors(n):
+			if m not in removed and m != n:
+				degrees[m] -= 1
+				heapq.heappush(heap, (-degrees[m],m))
+	return order
+
+def recalculate_measure(H, measure):
+	'''recalculates a measure on the remaining graph of an adaptive attack,
+	approximating betweenness with a sample of pivot nodes unless an accuracy was set for it'''
+	if measure in [nx.betweenness_centrality, betweenness.betweenness_centrality] and not betweenness.is_approximate() and H.number_of_nodes() > BC_PIVOTS:
+		return nx.betweenness_centrality(H, k=BC_PIVOTS, seed=RANDSEED)
+	return measure(H)
 
 def plot_robustness(data,filename):
 	'''plots the simulations'''
@@ -1326,7 +1929,15 @@ def plot_individual(path,networkNames,fraction):
 		plot_robustness(data, netName)
 	return None
 
-def multi_plot_robustness_by_treatment(multidata,figurePath,figureFile,rowLabels,colLabels, measures, fraction, net_path, title, max_y):
+def plot_bands(ax, x, bands, color, components):
+	'''shades the quantile bands of an ensemble of random attacks'''
+	lc_low, lc_high, sc_low, sc_high = bands
+	ax.fill_between(x, lc_low, lc_high, color=color, alpha=BAND_ALPHA, linewidth=0)
+	if components:
+		ax.fill_between(x, sc_low, sc_high, color=color, alpha=BAND_ALPHA, linewidth=0)
+	return None
+
+def multi_plot_robustness_by_treatment(multidata,figurePath,figureFile,rowLabels,colLabels, measures, fraction, net_path, title, max_y, unit='nodes'):
 	'''plots the simulations in a multiplot: each row is a location and each column is a treatment'''
 
 	# plotting locations in rows and treatments in columns
@@ -1372,6 +1983,8 @@ def multi_plot_robustness_by_treatment(multidata,figurePath,figureFile,rowLabels
 				linestyle='-',
 				label=str(measure.replace('_',' ')),
 				color=colors[measure])
+			if len(multidata[net+'_'+treatment][measure])>2:
+				plot_bands(ax, x, multidata[net+'_'+treatment][measure][2], colors[measure], True)
 			ppl.plot(ax,
 				x, 
 				sc_values,
@@ -1390,7 +2003,7 @@ def multi_plot_robustness_by_treatment(multidata,figurePath,figureFile,rowLabels
 
 		if not x_axis_label_done:
 			x_axis_label_done = True
-			ax.set_xlabel('Number of removed nodes')
+			ax.set_xlabel('Number of removed '+unit)
 
 	for ax in axes:
 		ax.set_autoscaley_on(False)
@@ -1432,7 +2045,7 @@ def multi_plot_robustness_by_treatment(multidata,figurePath,figureFile,rowLabels
 
 
 
-def multi_plot_robustness_by_measure(multidata,figurePath,figureFile,rowLabels,treatments,measures,fraction, net_path, title, max_y):
+def multi_plot_robustness_by_measure(multidata,figurePath,figureFile,rowLabels,treatments,measures,fraction, net_path, title, max_y, unit='nodes'):
 	'''plots the simulations in a multiplot: each row is a location and each column is a centrality measure'''
 
 	rowLabels.sort(reverse=True)
@@ -1444,8 +2057,11 @@ def multi_plot_robustness_by_measure(multidata,figurePath,figureFile,rowLabels,t
 	colors = {treatment: OM_COLORS[treatment] for i,treatment in enumerate(treatments)}
 	#print netNames, measures, len(rowLabels),len(colLabels), len(axes), colLabels*len(rowLabels)
 
-	robustnessTable = np.zeros(shape=(len(treatments)+1,len(measures)+1), dtype='S1000')
-	robustnessTable[1:,0]=np.array(treatments)
+	#the table has a row per treatment of each network, those of the graphs made for it (null models,
+	#random or scalefree graphs) follow those of the networks, and a column per measure
+	tableNets = [n for n in netNames if graph_kind(n) is None] + [n for n in netNames if graph_kind(n) is not None]
+	robustnessTable = np.zeros(shape=(len(tableNets)*len(treatments)+1,len(measures)+1), dtype='S1000')
+	robustnessTable[1:,0]=np.array([treatment_row_name(n, t) for n in tableNets for t in treatments])
 	robustnessTable[0,1:]=np.array([m.replace('_',' ').capitalize() for m in measures])
 
 
@@ -1471,8 +2087,8 @@ def multi_plot_robustness_by_measure(multidata,figurePath,figureFile,rowLabels,t
 	i,j=0,0
 	for ax,net,measure in iterable:
 		#indices for robustness factor table
-		j+=1 
-		i=0
+		j = measures.index(measure)+1
+		i = tableNets.index(net)*len(treatments)
 		for t in treatments:
 			lc_values = multidata[net+'_'+t][measure][0]
 			sc_values = multidata[net+'_'+t][measure][1]
@@ -1487,6 +2103,8 @@ def multi_plot_robustness_by_measure(multidata,figurePath,figureFile,rowLabels,t
 					linestyle='-',
 					label=str(t),
 					color=colors[t])
+				if len(multidata[net+'_'+t][measure])>2:
+					plot_bands(ax, x, multidata[net+'_'+t][measure][2], colors[t], len(rowLabels)==1)
 			else:
 				ppl.plot(ax,
 					[], 
@@ -1524,18 +2142,21 @@ def multi_plot_robustness_by_measure(multidata,figurePath,figureFile,rowLabels,t
 			ax.set_title(measure.replace('numpy','').replace('_',' ').capitalize())
 			measure_label_done.append(measure)
 		if net not in net_label_done:
-			ax.set_ylabel("Relative size of LCC of {0} networks".format(net.split('_')[1]))
+			if net.startswith(NULL_NAME):
+				ax.set_ylabel("Relative size of LCC of null models of {0}".format(net.replace(NULL_NAME,'').split('_')[1]))
+			else:
+				ax.set_ylabel("Relative size of LCC of {0} networks".format(net.split('_')[1]))
 			net_label_done.append(net)
 
 		if not x_axis_label_done:
 			x_axis_label_done = True
-			ax.set_xlabel('fraction of nodes removed')
+			ax.set_xlabel('fraction of '+unit+' removed')
 		if len(rowLabels)>1:
 			ax.set_ylim(0,1)
 
 
 	#save robustnessTable in a table
-	f = open(os.path.join(net_path,figurePath,"robustness_by_measure_{0}.txt".format(net)),'w')
+	f = open(os.path.join(net_path,figurePath,"robustness_by_measure_{0}.txt".format(tableNets[0])),'w')
 	np.savetxt(f, robustnessTable, delimiter="\t", fmt='%s')
 	f.close()
 
@@ -1561,6 +2182,21 @@ def multi_plot_robustness_by_measure(multidata,figurePath,figureFile,rowLabels,t
 
 	return None
 
+def graph_kind(netName):
+	'''returns the kind of graph made for a network (null models, random or scalefree graph)
+	that netName names, or None for a network itself'''
+	for prefix,kind in [(NULL_NAME,'null models'), (RAND_NAME,'random graph'), (SCALE_NAME,'scalefree graph')]:
+		if netName.startswith(prefix):
+			return kind
+	return None
+
+def treatment_row_name(netName, treatment):
+	'''names the row of a treatment of a network, or of the graphs made for it, in tables'''
+	kind = graph_kind(netName)
+	if kind is None:
+		return treatment
+	return treatment+' '+kind
+
 def make_js_files(netpath, newnetpath, ecozone, treatment, featurePath, featureFile, edgetype):
     '''make a network in js format'''
 
@@ -0,0 +1,121 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Degree-preserving null models of networks. Randomized copies are made
+either by double edge swaps, which rewire pairs of edges (a,b),(c,d) into
+(a,d),(c,b) and keep every node degree, or by an erased configuration
+model, which pairs up the edge stubs of each node at random. Swaps are
+done in batches of disjoint edge pairs with numpy so that large
+ensembles of large networks can be generated.
+'''
+
+#library imports
+import sys
+import os
+import numpy as np
+
+from compact_graph import CompactGraph, as_compact
+
+NULL_MODELS = ['swap','configuration']
+SWAPS_PER_EDGE = 10 #number of successful swaps per edge when rewiring a network
+MAX_TRIES_PER_SWAP = 100 #rewiring stops after this many attempts per swap, e.g. for nearly complete graphs
+
+
+def edge_keys(N, sources, targets):
+    '''returns one integer per undirected edge, the same for both directions'''
+    low = np.minimum(sources, targets).astype(np.int64)
+    high = np.maximum(sources, targets).astype(np.int64)
+    return low*N + high
+
+def is_member(sortedKeys, keys):
+    '''returns a boolean array of which keys are in the sorted array of keys'''
+    if len(sortedKeys) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.minimum(np.searchsorted(sortedKeys, keys), len(sortedKeys)-1)
+    return sortedKeys[positions] == keys
+
+def double_edge_swap(N, sources, targets, nswap, rng):
+    '''Rewires the edges of a simple graph with N nodes given as arrays of end
+    points with nswap double edge swaps and returns the new end point arrays.
+    Each round pairs up all the edges at random and tries one swap per pair;
+    swaps that would make a self loop or an edge already in the graph, or that
+    make the same edge as another swap of the round, are rejected.'''
+    sources = np.array(sources, dtype=np.int64)
+    targets = np.array(targets, dtype=np.int64)
+    M = len(sources)
+    half = M/2
+    if half == 0:
+        return sources, targets
+    keys = np.sort(edge_keys(N, sources, targets))
+    done = 0
+    tries = 0
+    while done < nswap and tries < nswap*MAX_TRIES_PER_SWAP:
+        permutation = rng.permutation(M)
+        first, second = permutation[:half], permutation[half:2*half]
+        a, b = sources[first], targets[first]
+        c, d = sources[second], targets[second]
+        #each pair can be rewired in two ways
+        flip = rng.randint(0, 2, size=half).astype(bool)
+        c, d = np.where(flip, d, c), np.where(flip, c, d)
+        #the new edges are (a,d) and (c,b)
+        ad = edge_keys(N, a, d)
+        cb = edge_keys(N, c, b)
+        valid = (a != d) & (c != b) & (ad != cb)
+        valid &= ~is_member(keys, ad) & ~is_member(keys, cb)
+        candidates = np.flatnonzero(valid)
+        newKeys = np.concatenate((ad[candidates], cb[candidates]))
+        unique, inverse, counts = np.unique(newKeys, return_inverse=True, return_counts=True)
+        repeated = counts[inverse] > 1
+        accepted = candidates[~(repeated[:len(candidates)] | repeated[len(candidates):])]
+        accepted = accepted[:nswap-done]
+        targets[first[accepted]] = d[accepted]
+        sources[second[accepted]] = c[accepted]
+        targets[second[accepted]] = b[accepted]
+        done += len(accepted)
+        tries += half
+        keys = np.sort(edge_keys(N, sources, targets))
+    return sources, targets
+
+def configuration_model(N, degrees, rng):
+    '''Pairs up the stubs of the nodes, degrees[i] for node i, at random and
+    returns the end point arrays of the edges. Self loops and repeated edges
+    are erased, so nodes can lose a few edges in dense parts of the network.'''
+    stubs = np.repeat(np.arange(N, dtype=np.int64), degrees)
+    rng.shuffle(stubs)
+    stubs = stubs[:len(stubs)/2*2]
+    sources, targets = stubs[0::2], stubs[1::2]
+    loops = sources == targets
+    keys = np.unique(edge_keys(N, sources[~loops], targets[~loops]))
+    return keys/N, keys%N
+
+def null_model(G, model='swap', seed=None, swapsPerEdge=SWAPS_PER_EDGE):
+    '''returns a randomized copy of G, a networkx graph or a CompactGraph, as a
+    CompactGraph with the same nodes. The random generator only depends on the seed.'''
+    C = as_compact(G)
+    N = C.number_of_nodes()
+    rng = np.random.RandomState(seed)
+    if model == 'swap':
+        sources, targets = C.edge_arrays()
+        sources, targets = double_edge_swap(N, sources, targets, swapsPerEdge*len(sources), rng)
+    elif model == 'configuration':
+        sources, targets = configuration_model(N, C.degrees(), rng)
+    else:
+        raise ValueError("Unknown null model '{0}', use one of: {1}".format(model, ', '.join(NULL_MODELS)))
+    return CompactGraph.from_edges(C.nodes, sources, targets)
+
+def null_seeds(replicates, seed):
+    '''returns the seed of each randomized copy, drawn from a generator independent of the global one'''
+    return np.random.RandomState(seed).randint(0, 2**31-1, size=replicates).tolist()
+
+def null_ensemble(G, seeds, model='swap'):
+    '''yields a randomized copy of G per seed'''
+    C = as_compact(G)
+    for seed in seeds:
+        yield null_model(C, model, seed)
+
+def split_seeds(seeds, jobs, chunksPerJob=4):
+    '''splits the seeds in chunks to spread them over a pool of processes'''
+    n = max(1, jobs*chunksPerJob)
+    return [seeds[i::n] for i in range(n) if len(seeds[i::n])]
@@ -0,0 +1,103 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Runs independent tasks, like the measures or simulations of each
+network, over a pool of worker processes.
+'''
+
+#library imports
+import sys
+import os
+import multiprocessing
+import collections
+import cPickle
+
+_shared = {} #data shared by all the tasks, set once in each worker process
+_groups = collections.OrderedDict() #shared data of the last groups whose tasks ran in a worker process
+
+
+def _init_worker(shared):
+    _shared['data'] = shared
+
+def _run_task(task):
+    func, args = task
+    return func(_shared['data'], *args)
+
+def _init_group_worker(window):
+    _shared['window'] = window
+
+def _run_group_task(task):
+    token, data, func, args = task
+    if token not in _groups:
+        _groups[token] = cPickle.loads(data)
+        while len(_groups) > _shared['window']:
+            _groups.popitem(last=False)
+    return func(_groups[token], *args)
+
+def map_tasks(func, tasks, jobs=1, shared=None):
+    '''Calls func(shared, *task) for every tuple of arguments in tasks and
+    returns the results in the order of the tasks. With more than one job,
+    the tasks run over a pool of processes. The shared data (e.g. the parsed
+    graphs) is handed to each worker once when the pool starts, instead of
+    with every task, and is inherited without copying where processes fork.
+    Inside a worker of another pool, which can't start its own, the tasks run
+    one after the other.'''
+    if jobs <= 1 or len(tasks) <= 1 or multiprocessing.current_process().daemon:
+        return [func(shared, *task) for task in tasks]
+    pool = multiprocessing.Pool(min(jobs, len(tasks)), initializer=_init_worker, initargs=(shared,))
+    try:
+        results = pool.map(_run_task, [(func, task) for task in tasks], chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    return results
+
+def imap_tasks(func, tasks, jobs=1, shared=None):
+    '''Like map_tasks, but yields the results one at a time in the order of
+    the tasks as they come back, so that only the results waiting for an
+    earlier task are kept in memory.'''
+    if jobs <= 1 or len(tasks) <= 1 or multiprocessing.current_process().daemon:
+        for task in tasks:
+            yield func(shared, *task)
+        return
+    pool = multiprocessing.Pool(min(jobs, len(tasks)), initializer=_init_worker, initargs=(shared,))
+    try:
+        for result in pool.imap(_run_task, [(func, task) for task in tasks], chunksize=1):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+def imap_groups(groups, jobs=1, window=2):
+    '''Runs the tasks of a stream of groups over one pool of processes kept for
+    the whole stream and yields the (info, results) of each group in the order
+    of the groups. Each group is an (info, func, shared, tasks) tuple whose
+    tasks are run as in map_tasks, so the tasks of several groups (e.g. the
+    curves of several networks) are spread over the jobs together. Up to
+    window groups run while the next one is taken from the stream, beyond
+    that the results of the oldest are awaited first. The shared data of a
+    group is pickled once and each worker unpickles it once for all the tasks
+    of the group it runs. Inside a worker of another pool, the tasks run one
+    after the other.'''
+    if jobs <= 1 or multiprocessing.current_process().daemon:
+        for info, func, shared, tasks in groups:
+            yield info, [func(shared, *task) for task in tasks]
+        return
+    pool = multiprocessing.Pool(jobs, initializer=_init_group_worker, initargs=(window+1,))
+    pending = collections.deque()
+    try:
+        for token, (info, func, shared, tasks) in enumerate(groups):
+            data = cPickle.dumps(shared, cPickle.HIGHEST_PROTOCOL) if tasks else None
+            pending.append((info, [pool.apply_async(_run_group_task, ((token, data, func, task),)) for task in tasks]))
+            data = None
+            while len(pending) > window:
+                info, results = pending.popleft()
+                yield info, [r.get() for r in results]
+        while pending:
+            info, results = pending.popleft()
+            yield info, [r.get() for r in results]
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,190 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Shortest path lengths between all the nodes of a network from one breadth
+first search per source. Each search only adds its distances to a histogram
+of path lengths, so the diameter, the average shortest path and the
+distribution of path lengths all come from the same sweep without keeping
+more than one array of distances per process. Sources are split in chunks
+over a pool of processes sharing the graph and the histograms of the
+chunks are added up.
+
+For very large networks, the sweep can be replaced by estimates. The
+diameter is bounded below by the eccentricities found with double sweeps
+(a search from the farthest node found by the previous one) and above as in
+iFUB (Crescenzi et al. 2013): the nodes are searched from the farthest from
+a central node inwards, and once the nodes past level i of a search from
+the centre have all been searched, no shortest path is longer than the
+largest of their eccentricities or 2i. The average shortest path is the mean
+over a sample of sources of their average distance to the other nodes, with
+a normal confidence interval corrected for sampling without replacement.
+'''
+
+#library imports
+import sys
+import os
+import math
+import numpy as np
+import scipy.stats
+
+import parallel
+from compact_graph import as_compact
+
+SOURCE_CHUNKS_PER_JOB = 4 #sources are split in this many chunks per process to balance the load
+RANDSEED = 2
+SAMPLED_SOURCES = 100 #default number of sources sampled to estimate the average shortest path
+BOUND_SEARCHES = 100 #default largest number of searches run to bound the diameter
+CONFIDENCE = 0.95 #default confidence level of the interval around the estimated average shortest path
+DOUBLE_SWEEPS = 2 #number of double sweeps giving the first lower bound of the diameter
+
+_approximation = {'sources':None, 'searches':BOUND_SEARCHES, 'confidence':CONFIDENCE, 'seed':RANDSEED}
+
+
+def set_approximation(sources=None, searches=BOUND_SEARCHES, confidence=CONFIDENCE, seed=RANDSEED):
+    '''Sets the diameter and average shortest path to be estimated, from a sample
+    of sources and at most a number of searches, or found exactly if sources is None'''
+    if sources is not None and (sources < 2 or searches < 1):
+        raise ValueError('At least two sources and one search are needed to estimate shortest paths')
+    if not 0 < confidence < 1:
+        raise ValueError('The confidence level must be between 0 and 1')
+    _approximation.update({'sources':sources, 'searches':searches, 'confidence':confidence, 'seed':seed})
+    return None
+
+def is_approximate():
+    return _approximation['sources'] is not None
+
+def confidence():
+    return _approximation['confidence']
+
+
+def path_length_histogram(G, jobs=1):
+    '''Returns an array with the number of ordered pairs of nodes of G, a networkx
+    graph or a CompactGraph, whose shortest path has each length, from 0 to the
+    longest. Pairs of nodes in different components aren't counted.'''
+    C = as_compact(G)
+    N = C.number_of_nodes()
+    histogram = np.zeros(1, dtype=np.int64)
+    for counts in parallel.map_tasks(chunk_histogram, split_sources(range(N), jobs), jobs, C):
+        histogram = add_histograms(histogram, counts)
+    return histogram
+
+def chunk_histogram(C, sources):
+    '''task run by each process: the histogram of the lengths of the shortest paths from a chunk of sources'''
+    histogram = np.zeros(1, dtype=np.int64)
+    for s in sources:
+        distances = C.bfs(s)
+        histogram = add_histograms(histogram, np.bincount(distances[distances > 0]))
+    return histogram
+
+def add_histograms(first, second):
+    '''adds two histograms of path lengths which may go up to different lengths'''
+    if len(first) < len(second):
+        first, second = second, first
+    total = first.copy()
+    total[:len(second)] += second
+    return total
+
+def diameter(histogram):
+    '''the length of the longest shortest path'''
+    return len(np.trim_zeros(histogram, 'b')) - 1 if histogram.any() else 0
+
+def average_path(histogram):
+    '''the average length of the shortest paths between the pairs of nodes counted in the histogram'''
+    pairs = histogram[1:].sum()
+    return np.dot(np.arange(len(histogram)), histogram)/float(pairs) if pairs else 0
+
+
+def estimate_paths(G, jobs=1):
+    '''Returns a dictionary with the bounds of the diameter of G, a connected networkx
+    graph or CompactGraph, and the average shortest path estimated from a sample of
+    sources with its confidence interval, as set with set_approximation. The histogram
+    is that of the sampled sources scaled to all sources.'''
+    C = as_compact(G)
+    estimates = diameter_bounds(C, _approximation['searches'], jobs)
+    estimates.update(sample_average_path(C, _approximation['sources'], _approximation['confidence'], _approximation['seed'], jobs))
+    return estimates
+
+def diameter_bounds(C, searches=BOUND_SEARCHES, jobs=1):
+    '''Returns the lower and upper bounds of the diameter of a connected CompactGraph
+    found with at most about the given number of breadth first searches, and the
+    number of searches run. Both bounds are equal when the diameter is exact.'''
+    N = C.number_of_nodes()
+    if N < 2:
+        return {'lower':0, 'upper':0, 'searches':0}
+    #double sweeps from the node of highest degree
+    start = int(np.argmax(C.degrees()))
+    lower = 0
+    for sweep in range(DOUBLE_SWEEPS):
+        fromStart = C.bfs(start)
+        a = int(np.argmax(fromStart))
+        fromA = C.bfs(a)
+        b = int(np.argmax(fromA))
+        lower = max(lower, int(fromStart.max()), int(fromA.max()))
+        start = b
+    done = 2*DOUBLE_SWEEPS
+    #the centre is halfway on the last shortest path found between a and b
+    fromB = C.bfs(b)
+    length = fromA[b]
+    middle = np.flatnonzero((fromA == length/2) & (fromB == length-length/2))
+    centre = int(middle[0]) if len(middle) else a
+    levels = C.bfs(centre)
+    done += 2
+    level = int(levels.max())
+    lower = max(lower, level)
+    upper = 2*level
+    #iFUB: nodes are searched from the outermost level of the centre inwards
+    while upper > lower and done < searches:
+        fringe = np.flatnonzero(levels == level).tolist()
+        fringe = fringe[:searches-done]
+        lower = max([lower] + parallel.map_tasks(chunk_eccentricity, split_sources(fringe, jobs), jobs, C))
+        done += len(fringe)
+        if len(fringe) == len(np.flatnonzero(levels == level)):
+            level -= 1
+            upper = max(lower, 2*level)
+    return {'lower':lower, 'upper':max(lower, upper), 'searches':done}
+
+def chunk_eccentricity(C, sources):
+    '''task run by each process: the largest eccentricity of a chunk of sources'''
+    return max([int(C.bfs(s).max()) for s in sources])
+
+def sample_average_path(C, sources=SAMPLED_SOURCES, confidence=CONFIDENCE, seed=RANDSEED, jobs=1):
+    '''Returns the average shortest path of a connected CompactGraph estimated from the
+    average distance of a random sample of sources to the other nodes, the bounds of
+    its confidence interval, the number of sources used and the histogram of path
+    lengths scaled to all sources. With as many sources as nodes, it is exact.'''
+    N = C.number_of_nodes()
+    if N < 2:
+        return {'mean':0, 'interval':(0,0), 'sources':N, 'histogram':np.zeros(1, dtype=np.int64)}
+    k = min(N, sources)
+    sample = np.random.RandomState(seed).choice(N, k, replace=False).tolist()
+    histogram = np.zeros(1, dtype=np.int64)
+    means = []
+    for counts,totals in parallel.map_tasks(chunk_distances, split_sources(sample, jobs), jobs, C):
+        histogram = add_histograms(histogram, counts)
+        means.extend(totals)
+    means = np.array(means)/float(N-1)
+    mean = np.mean(means)
+    #normal interval on the mean of a sample drawn without replacement from the N sources
+    error = np.std(means, ddof=1)/math.sqrt(k)*math.sqrt((N-k)/float(N-1))
+    z = scipy.stats.norm.ppf(0.5+confidence/2.0)
+    return {'mean':mean, 'interval':(mean-z*error, mean+z*error), 'sources':k,
+            'histogram':np.rint(histogram*(N/float(k))).astype(np.int64)}
+
+def chunk_distances(C, sources):
+    '''task run by each process: the histogram of the path lengths from a chunk of sources
+    and the sum of the distances from each of them'''
+    histogram = np.zeros(1, dtype=np.int64)
+    totals = []
+    for s in sources:
+        distances = C.bfs(s)
+        reached = distances[distances > 0]
+        histogram = add_histograms(histogram, np.bincount(reached))
+        totals.append(int(reached.sum()))
+    return histogram, totals
+
+def split_sources(sources, jobs):
+    '''splits sources in chunks given as tasks to a pool of jobs processes'''
+    chunks = [(sources[i::jobs*SOURCE_CHUNKS_PER_JOB],) for i in range(jobs*SOURCE_CHUNKS_PER_JOB)]
+    return [c for c in chunks if len(c[0])]
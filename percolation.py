@@ -0,0 +1,267 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Union-find percolation engine used by the attack simulations.
+Instead of recomputing the connected components after every removal,
+nodes are added back in reverse removal order and merged with a
+weighted union-find, so a whole curve costs O((N+E) a(N)).
+'''
+
+#library imports
+import sys
+import os
+import numpy as np
+
+import parallel
+from compact_graph import as_compact
+
+ENSEMBLE_CHUNKS_PER_JOB = 4 #replicates are split in this many chunks per process to balance the load
+CRITICAL_LCC_FRACTION = 0.5 #the critical fraction is reached when the largest component drops below this relative size
+
+
+def union(parent, size, i, j):
+    '''Union-find shared by the percolation curves: merges the components of
+    nodes i and j, the smaller one into the larger one, and returns the root of
+    the merged component, or -1 if they were already in the same component.
+    Roots are found with path halving, inlined as this runs for every edge.'''
+    ri = i
+    while parent[ri] != ri:
+        parent[ri] = parent[parent[ri]]
+        ri = parent[ri]
+    rj = j
+    while parent[rj] != rj:
+        parent[rj] = parent[parent[rj]]
+        rj = parent[rj]
+    if ri == rj:
+        return -1
+    if size[ri] < size[rj]:
+        ri, rj = rj, ri
+    parent[rj] = ri
+    size[ri] += size[rj]
+    return ri
+
+
+def attack_curve(G, order, fraction):
+    '''Measure the size of the largest component of the graph
+    as nodes are removed in the given order. Gives the same
+    output as removing the nodes one by one and recomputing
+    the components of the graph after each removal.
+    G can be a networkx graph or a CompactGraph.'''
+    C = as_compact(G)
+    indptr, indices = C.adjacency_lists()
+    removal = int(C.number_of_nodes()*fraction)-1 #can't remove last node, otherwise there is nothing to measure!
+    return percolation_curve(indptr, indices, C.node_indices(order), removal)
+
+def percolation_curve(indptr, indices, order, removal):
+    '''Takes the CSR adjacency lists of a graph and a removal order of node indices
+    and returns the relative size of the largest component and the average size
+    of the other components after each of the first nodes in order[:removal]
+    is removed. The first value of both curves is 1, as in the attack plots.'''
+    N = len(indptr)-1
+    removed = len(order[:removal])
+
+    #nodes never removed go at the end of the order so they are added back first
+    seen = set(order)
+    order = list(order) + [i for i in xrange(N) if i not in seen]
+
+    parent = range(N)
+    size = [1]*N
+    present = [False]*N
+    largest = 0
+    components = 0
+    lc_counts = [0]*(removed+1) #absolute size of big component after k removals
+    cc_counts = [0]*(removed+1) #number of components after k removals
+
+    for k in xrange(N-1, -1, -1):
+        i = order[k]
+        present[i] = True
+        components += 1
+        for j in indices[indptr[i]:indptr[i+1]]:
+            if not present[j]:
+                continue
+            root = union(parent, size, i, j)
+            if root < 0:
+                continue
+            components -= 1
+            if size[root] > largest:
+                largest = size[root]
+        if largest == 0:
+            largest = 1
+        if k <= removed:
+            lc_counts[k] = largest
+            cc_counts[k] = components
+
+    startSize = float(lc_counts[0])
+    lc_sizes = [1] #relative size of big component
+    sc_sizes = [1] #avg size of smaller components
+    for k in xrange(1, removed+1):
+        lc_sizes.append(lc_counts[k]/startSize)
+        if cc_counts[k] > 1:
+            sc_sizes.append((N - k - lc_counts[k])/float(cc_counts[k]-1))
+        else:
+            sc_sizes.append(1.0)
+    return lc_sizes, sc_sizes
+
+
+def largest_component_size(indptr, indices):
+    '''returns the size of the largest connected component using a union-find'''
+    N = len(indptr)-1
+    parent = range(N)
+    size = [1]*N
+    for i in xrange(N):
+        for j in indices[indptr[i]:indptr[i+1]]:
+            union(parent, size, i, j)
+    return max(size) if N else 0
+
+def percolation_summary(indptr, indices, order, removal, threshold=CRITICAL_LCC_FRACTION):
+    '''Same attack as percolation_curve but only keeps running summaries of the
+    curve instead of the curve itself. Returns:
+    - the R-index, the size of the largest component relative to the number of
+    nodes N summed over every removal and divided by N (Schneider et al. 2011)
+    - the critical fraction, the fraction of removed nodes at which the largest
+    component first drops below threshold times its starting size (1 if it never does)
+    - the peak of the average size of the components other than the largest'''
+    N = len(indptr)-1
+    removed = len(order[:removal])
+    cutoff = threshold*largest_component_size(indptr, indices)
+
+    seen = set(order)
+    order = list(order) + [i for i in xrange(N) if i not in seen]
+
+    parent = range(N)
+    size = [1]*N
+    present = [False]*N
+    largest = 0
+    components = 0
+    lcSum = 0
+    critical = removed+1
+    peak = 1.0
+
+    for k in xrange(N-1, -1, -1):
+        i = order[k]
+        present[i] = True
+        components += 1
+        for j in indices[indptr[i]:indptr[i+1]]:
+            if not present[j]:
+                continue
+            root = union(parent, size, i, j)
+            if root < 0:
+                continue
+            components -= 1
+            if size[root] > largest:
+                largest = size[root]
+        if largest == 0:
+            largest = 1
+        if 0 < k <= removed:
+            lcSum += largest
+            if largest < cutoff:
+                critical = k #the largest component only grows as k decreases
+            if components > 1:
+                peak = max(peak, (N - k - largest)/float(components-1))
+
+    if critical > removed:
+        criticalFraction = 1.0
+    else:
+        criticalFraction = critical/float(N)
+    return lcSum/float(N)/N, criticalFraction, peak
+
+
+def edge_attack_curve(G, order, fraction):
+    '''Measure the size of the largest component of the graph
+    as edges are removed in the given order.
+    G can be a networkx graph or a CompactGraph.'''
+    C = as_compact(G)
+    sources, targets = C.edge_arrays()
+    removal = int(len(sources)*fraction)
+    return bond_percolation_curve(C.number_of_nodes(), sources.tolist(), targets.tolist(), C.edge_indices(order), removal)
+
+def bond_percolation_curve(N, sources, targets, order, removal):
+    '''Takes the end points of the edges of a graph with N nodes and a removal
+    order of edge indices and returns the relative size of the largest component
+    and the average size of the other components after each of the first edges
+    in order[:removal] is removed. Edges are added back in reverse order, all
+    nodes being present throughout.'''
+    removed = len(order[:removal])
+
+    #edges never removed go at the end of the order so they are added back first
+    seen = set(order)
+    order = list(order) + [e for e in xrange(len(sources)) if e not in seen]
+
+    parent = range(N)
+    size = [1]*N
+    largest = 1
+    components = N
+    lc_counts = [0]*(removed+1) #absolute size of big component after k removals
+    cc_counts = [0]*(removed+1) #number of components after k removals
+    if len(order) <= removed:
+        lc_counts[len(order)] = largest
+        cc_counts[len(order)] = components
+
+    for k in xrange(len(order)-1, -1, -1):
+        e = order[k]
+        root = union(parent, size, sources[e], targets[e])
+        if root >= 0:
+            components -= 1
+            if size[root] > largest:
+                largest = size[root]
+        if k <= removed:
+            lc_counts[k] = largest
+            cc_counts[k] = components
+
+    startSize = float(lc_counts[0])
+    lc_sizes = [1] #relative size of big component
+    sc_sizes = [1] #avg size of smaller components
+    for k in xrange(1, removed+1):
+        lc_sizes.append(lc_counts[k]/startSize)
+        if cc_counts[k] > 1:
+            sc_sizes.append((N - lc_counts[k])/float(cc_counts[k]-1))
+        else:
+            sc_sizes.append(1.0)
+    return lc_sizes, sc_sizes
+
+
+### Monte Carlo ensembles of random attacks
+
+def _ensemble_chunk(shared, seeds):
+    '''runs one random attack per seed, each with its own random number generator'''
+    if shared['summarize']:
+        summaries = []
+        for seed in seeds:
+            order = np.random.RandomState(seed).permutation(len(shared['indptr'])-1).tolist()
+            summaries.append(percolation_summary(shared['indptr'], shared['indices'], order, shared['removal']))
+        return np.array(summaries)
+    return random_attacks(shared['indptr'], shared['indices'], shared['removal'], seeds)
+
+def random_attacks(indptr, indices, removal, seeds):
+    '''runs one random attack per seed, in the order of the seeds, and returns
+    the arrays of the curves of the largest and smaller components'''
+    lcs, scs = [], []
+    for seed in seeds:
+        order = np.random.RandomState(seed).permutation(len(indptr)-1).tolist()
+        lc_sizes, sc_sizes = percolation_curve(indptr, indices, order, removal)
+        lcs.append(lc_sizes)
+        scs.append(sc_sizes)
+    return np.array(lcs), np.array(scs)
+
+def random_ensemble(indptr, indices, removal, seeds, jobs=1):
+    '''Runs a random attack for each seed, spread over a pool of jobs processes,
+    and returns two arrays with one row per replicate: the relative size of the
+    largest component and the average size of the other components.'''
+    results = _map_ensemble(indptr, indices, removal, seeds, jobs, False)
+    lcs = np.concatenate([r[0] for r in results])
+    scs = np.concatenate([r[1] for r in results])
+    return lcs, scs
+
+def random_summary_ensemble(indptr, indices, removal, seeds, jobs=1):
+    '''Runs a random attack for each seed like random_ensemble but only returns
+    an array with the R-index, critical fraction and peak of the average size of
+    smaller components of each replicate, so memory doesn't grow with the curves.'''
+    return np.concatenate(_map_ensemble(indptr, indices, removal, seeds, jobs, True))
+
+def _map_ensemble(indptr, indices, removal, seeds, jobs, summarize):
+    '''splits the seeds in chunks and runs them over a pool of processes'''
+    chunks = [seeds[i::jobs*ENSEMBLE_CHUNKS_PER_JOB] for i in range(jobs*ENSEMBLE_CHUNKS_PER_JOB)]
+    shared = {'indptr':indptr, 'indices':indices, 'removal':removal, 'summarize':summarize}
+    return parallel.map_tasks(_ensemble_chunk, [(c,) for c in chunks if len(c)], jobs, shared)
@@ -8,6 +8,7 @@ import sys, os
 import argparse
 import numpy as np
 from network_simulation import *
+import make_network
 
 #What to plot
 import platform
@@ -29,11 +30,14 @@ INDVAL_FILE_END = '_indvals_combo_om_horizon.txt'
 FEATURE_FILE = 'feature_and_node_measures_table'
 FEATURES = ['SoilHorizon']
 BC_FEATURES = ['Betweenness centrality','SoilHorizon avg','SoilHorizon std','Abundance']
-MEASURES = [nx.betweenness_centrality, 
+MEASURES = [betweenness.betweenness_centrality, 
 			nx.degree_centrality,
 			nx.closeness_centrality,
 			#nx.eigenvector_centrality_numpy,
 			 ]
+EDGE_MEASURES = [nx.edge_betweenness_centrality,
+				nm.edge_clustering,
+				]
 PERCENT_BC_NODES = 0.1
 BC_MIN_VALUE = 0.005
 
@@ -45,6 +49,10 @@ TREATMENTS.sort()
 
 PROP_TO_REMOVE = 1 #only removing this percent of nodes
 MAX_Y_AXIS = 5.5
+RANDOM_REPLICATES = 1
+JOBS = 1
+NULL_REPLICATES = 0
+EDGE_TYPES = ['both','pos','neg']
 DEGREE_SEQUENCE = False
 
 FACTOR = 2
@@ -63,13 +71,31 @@ def main(*argv):
 	parser.add_argument('-distribution', help='Plots degree distribution', action = 'store_true')
 	parser.add_argument('-assess', help='Assess ecological properties', action = 'store_true')
 	parser.add_argument('-maketable', help='Make OTU table with eclogical measures', action = 'store_true')
-	parser.add_argument('-edgetype', help='Specify which types edges to use', default = 'both')
+	parser.add_argument('-edgetype', help='Specify which types edges to use: both, pos, neg or all to run for each type', default = 'both')
 	#arguments used when running simulations
 	parser.add_argument('-fraction', help='Fraction of nodes to remove', default = PROP_TO_REMOVE)
 	parser.add_argument('-addrandom', help='Runs simulation on random network of same size', action = 'store_true')
 	parser.add_argument('-addscalefree', help='Runs simulation on scale network of same size', action = 'store_true')
 	parser.add_argument('-treatment', help='Makes a plot for each treatment', action = 'store_true')
 	parser.add_argument('-measure', help='Makes a plot for each centrality measure', action = 'store_true')
+	parser.add_argument('-edges', help='Simulates edge removal instead of node removal', action = 'store_true')
+	parser.add_argument('-cascade', help='Simulates cascading failures where the load of failed nodes is passed on to their neighbours', action = 'store_true')
+	parser.add_argument('-load', help='Load carried by nodes in cascading failures: betweenness or degree. Betweenness loads of networks over 2000 nodes are estimated from 500 pivots unless -bcpivots or -bcepsilon is given', default = CASCADE_LOAD)
+	parser.add_argument('-tolerance', help='Extra load nodes can carry in cascading failures, as a fraction of their initial load', default = cascades.TOLERANCE)
+	parser.add_argument('-adaptive', help='Recalculates the centrality measure during the attack', action = 'store_true')
+	parser.add_argument('-interval', help='Number of nodes removed before recalculating the measure in adaptive attacks', default = None)
+	parser.add_argument('-replicates', help='Number of random attacks averaged for the random curve', default = RANDOM_REPLICATES)
+	parser.add_argument('-jobs', help='Number of processes to run simulations and betweenness centrality on', default = JOBS)
+	parser.add_argument('-robustnessreplicates', help='Number of random attacks summarized in the robustness metrics of the table of measures', default = ROBUSTNESS_REPLICATES)
+	parser.add_argument('-nullreplicates', help='Number of degree preserving null models to compare each network with', default = NULL_REPLICATES)
+	parser.add_argument('-backend', help='Graph representation used by -calculate only: networkx, compact or mapped (from an on-disk graph store). Other options use networkx graphs', default = 'networkx')
+	parser.add_argument('-bcpivots', help='Estimates betweenness centrality from this number of pivot nodes instead of all nodes', default = None)
+	parser.add_argument('-bcepsilon', help='Estimates betweenness centrality within this error of the exact values, with probability 1-bcdelta', default = None)
+	parser.add_argument('-bcdelta', help='Probability that estimated betweenness centralities are off by more than bcepsilon', default = betweenness.BC_DELTA)
+	parser.add_argument('-pathsources', help='Estimates the average path on the largest connected component from this number of sampled sources, and bounds its diameter, instead of searching from all nodes', default = None)
+	parser.add_argument('-pathsearches', help='Largest number of searches run to bound the diameter when estimating shortest paths', default = path_lengths.BOUND_SEARCHES)
+	parser.add_argument('-pathconfidence', help='Confidence level of the interval around the estimated average path', default = path_lengths.CONFIDENCE)
+	parser.add_argument('-nullmodel', help='Null model used to randomize networks: swap or configuration', default = NULL_MODEL)
 	parser.add_argument('-showcomponents', help='Average size of large component fragments to show', default = MAX_Y_AXIS)
 	parser.add_argument('-wholenetwork', help='Makes a plot for whole network, not per treatments', action = 'store_true')
 	#arguments and plots for central OTUs
@@ -96,14 +122,62 @@ def main(*argv):
 		parser.print_help()
 		sys.exit()	
 
-	if args.edgetype not in ['both','pos','neg']:
-		print "\n***You must specify what edges you want to use to build the network: both, pos or neg.***\n"
+	if args.edgetype not in EDGE_TYPES+['all']:
+		print "\n***You must specify what edges you want to use to build the network: both, pos, neg or all.***\n"
 		parser.print_help()
 		sys.exit()
 
+	if int(args.robustnessreplicates) < 1:
+		print "\n***The robustness metrics need at least one random attack.***\n"
+		parser.print_help()
+		sys.exit()
+
+	if args.backend not in nm.BACKENDS:
+		print "\n***The backend must be one of: "+', '.join(nm.BACKENDS)+".***\n"
+		parser.print_help()
+		sys.exit()
+	if args.backend != 'networkx' and not args.calculate:
+		print "\n***The backend is only used with -calculate, networkx graphs are used instead.***\n"
+
+	if args.nullmodel not in null_models.NULL_MODELS:
+		print "\n***The null model must be one of: "+', '.join(null_models.NULL_MODELS)+".***\n"
+		parser.print_help()
+		sys.exit()
+
+	try:
+		betweenness.set_accuracy(pivots=int(args.bcpivots) if args.bcpivots else None,
+								epsilon=float(args.bcepsilon) if args.bcepsilon else None,
+								delta=float(args.bcdelta))
+		betweenness.set_jobs(int(args.jobs))
+		path_lengths.set_approximation(sources=int(args.pathsources) if args.pathsources else None,
+								searches=int(args.pathsearches),
+								confidence=float(args.pathconfidence))
+	except ValueError as e:
+		print "\n***"+str(e)+".***\n"
+		parser.print_help()
+		sys.exit()
+
+	if args.edgetype == 'all':
+		edgetypes = EDGE_TYPES
+	else:
+		edgetypes = [args.edgetype]
+	if args.calculate or args.simulate:
+		#networks are streamed once and each is built with every type of edges from one parse
+		run(args, parser, edgetypes)
+	else:
+		#the node and edge files of each network are only parsed once for all types of edges
+		make_network.keep_parsed(len(edgetypes) > 1)
+		for edgetype in edgetypes:
+			run(args, parser, [edgetype])
+		make_network.keep_parsed(False)
+	return None
+
+def run(args, parser, edgetypes):
+	'''runs the option chosen by the user on networks built with the types of edges in edgetypes,
+	options other than calculate and simulate take a single type of edges'''
 	factors = args.factors
+	edgetype = edgetypes[0]
 
-	edgetype = args.edgetype
 	net_path = os.path.join(args.path,args.folder)
 	print net_path
 	if args.folder == 'by_zone':
@@ -121,11 +195,13 @@ def main(*argv):
 
 	###depending on option specified, choose different things
 	if args.calculate:
-		print "\nCalculating structural properties on "+edgetype+" type of edges of networks:"
+		print "\nCalculating structural properties on "+','.join(edgetypes)+" type of edges of networks:"
 		print ", ".join(networks), '\n'
-		filePath = os.path.join(figurePath,'table_of_measures_'+'_'.join(args.networks)+'_'+edgetype+'.txt')
-		print filePath
-		network_structure(net_path,networks,filePath,edgetype, os.path.join(args.path,INPUT_FOLDER),INPUT_FILE_END, featurePath, FEATURE_FILE)
+		filePaths = {}
+		for edgetype in edgetypes:
+			filePaths[edgetype] = os.path.join(figurePath,'table_of_measures_'+'_'.join(args.networks)+'_'+edgetype+'.txt')
+			print filePaths[edgetype]
+		network_structure(net_path,networks,filePaths,edgetypes, os.path.join(args.path,INPUT_FOLDER),INPUT_FILE_END, featurePath, FEATURE_FILE, replicates=int(args.robustnessreplicates), jobs=int(args.jobs), nullReplicates=int(args.nullreplicates), nullModel=args.nullmodel, backend=args.backend)
 
 	elif args.modules:
 		print "\nCalculating structural properties on "+edgetype+" type of edges of modules in networks:"
@@ -249,18 +325,46 @@ def main(*argv):
 			max_y = float(max_y)
 
 		fraction = float(args.fraction)
-		if len(networks)>1:
-			figureName = 'plot_'+'_'.join(args.networks)+'_'+edgetype+'_'+ plot_by+'.png'
+		if args.interval:
+			interval = int(args.interval)
 		else:
-			figureName = 'plot_'+'_'.join(args.networks)+'_'+edgetype+'_'+ plot_by +'_prop='+str(fraction)+'_maxy='+str(max_y)+'.png'
-		measures = MEASURES
-
-		print "\nSimulating and plotting the robustness on "+edgetype+" type of edges of networks:"
+			interval = None
+		if args.edges:
+			attack = 'edge'
+			measures = EDGE_MEASURES
+		elif args.cascade:
+			attack = 'cascade'
+			measures = MEASURES
+			if args.load not in ['betweenness','degree']:
+				print "\n***The load of cascading failures must be betweenness or degree.***\n"
+				parser.print_help()
+				sys.exit()
+		else:
+			attack = 'node'
+			measures = MEASURES
+		if args.adaptive:
+			plot_by_name = plot_by+'_adaptive'
+		else:
+			plot_by_name = plot_by
+		if args.edges:
+			plot_by_name = plot_by_name+'_edges'
+		elif args.cascade:
+			plot_by_name = plot_by_name+'_cascade_'+args.load+'_'+str(float(args.tolerance))
+		if int(args.nullreplicates):
+			plot_by_name = plot_by_name+'_null_'+args.nullmodel
+		figureNames = {}
+		for edgetype in edgetypes:
+			if len(networks)>1:
+				figureNames[edgetype] = 'plot_'+'_'.join(args.networks)+'_'+edgetype+'_'+ plot_by_name+'.png'
+			else:
+				figureNames[edgetype] = 'plot_'+'_'.join(args.networks)+'_'+edgetype+'_'+ plot_by_name +'_prop='+str(fraction)+'_maxy='+str(max_y)+'.png'
+
+		print "\nSimulating and plotting the robustness on "+','.join(edgetypes)+" type of edges of networks:"
 		print ", ".join(networks)
-		print "and plotting "+str(fraction)+" fraction of nodes "+plot_by+" and with following measures:"
+		print "and plotting "+str(fraction)+" fraction of "+attack+"s "+plot_by+" and with following measures:"
 		print ", ".join([m.__name__ for m in measures])
 		print "\n"
-		plot_multiple(net_path, networks, measures, plot_by, fraction, figurePath, figureName, edgetype, add_random, add_scalefree, max_y)
+		plot_multiple(net_path, networks, measures, plot_by, fraction, figurePath, figureNames, edgetypes, add_random, add_scalefree, max_y, adaptive=args.adaptive, interval=interval, replicates=int(args.replicates), jobs=int(args.jobs), attack=attack, cascadeLoad=args.load, tolerance=float(args.tolerance), nullReplicates=int(args.nullreplicates), nullModel=args.nullmodel)
 	
 if __name__ == "__main__":
 	main(*sys.argv[1:])
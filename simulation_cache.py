@@ -0,0 +1,155 @@
+'''
+created  10/18/2026
+
+by sperez
+
+On-disk store of attack simulation curves. Each curve is saved as a
+numpy archive keyed by a content hash of the graph, the edgetype,
+the measure, the fraction and the random seed. A json entry next to
+each curve keeps the stamps of the input files it came from, so that
+curves of changed inputs are dropped, and the modification time of
+the archive tells when it was last used, so that the least recently
+used ones are evicted when the store grows past its size limit. The
+fingerprint of each graph is also kept with the stamps of its input
+files, so saved curves can be found without building the graph again.
+No file is shared by several curves and each one is written under a
+temporary name then renamed, so several runs can use the store at once.
+'''
+
+#library imports
+import sys
+import os
+import json
+import hashlib
+import numpy as np
+
+from graph_cache import replace_file, make_folder
+
+MAX_CACHE_BYTES = 500*1024*1024 #size limit of the store
+FINGERPRINT_PREFIX = 'graph_' #entries of graph fingerprints, the others are entries of curves
+
+
+def graph_fingerprint(G):
+    '''returns a hash of the nodes and edges of a networkx graph that
+    does not depend on the order in which they are stored'''
+    h = hashlib.sha1()
+    for n in sorted(str(n) for n in G.nodes()):
+        h.update(n+'\n')
+    for e in sorted('\t'.join(sorted([str(s),str(t)])) for s,t in G.edges()):
+        h.update(e+'\n')
+    return h.hexdigest()
+
+def cache_key(fingerprint, edgetype, measure, fraction, seed):
+    '''returns the key of a curve'''
+    return hashlib.sha1('|'.join([fingerprint, edgetype, measure, repr(float(fraction)), str(seed)])).hexdigest()
+
+def file_stamps(files):
+    '''returns the size and modification time of each input file'''
+    return {f:[os.path.getsize(f), os.path.getmtime(f)] for f in files if os.path.exists(f)}
+
+def load_entry(folder, name):
+    '''returns the json entry saved under a name, or None if there is none or it can't be read'''
+    try:
+        with open(os.path.join(folder, name+'.json'), 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+def save_entry(folder, name, entry):
+    make_folder(folder)
+    replace_file(os.path.join(folder, name+'.json'), lambda f: json.dump(entry, f))
+    return None
+
+def curve_keys(folder):
+    '''returns the keys of the curves saved in the store'''
+    if not os.path.isdir(folder):
+        return []
+    return [f[:-len('.npz')] for f in os.listdir(folder) if f.endswith('.npz')]
+
+def graph_key(sources, settings):
+    '''returns the key of a graph made from input files with the given settings (e.g. edgetype and graph name)'''
+    return hashlib.sha1('|'.join(list(settings) + sorted(sources))).hexdigest()
+
+def load_fingerprint(folder, sources, settings):
+    '''returns the fingerprint saved for the graph made from the input files with
+    the given settings, or None if it wasn't saved or the files have changed since'''
+    entry = load_entry(folder, FINGERPRINT_PREFIX+graph_key(sources, settings))
+    if entry is None or entry['sources'] != file_stamps(sources):
+        return None
+    return str(entry['fingerprint'])
+
+def save_fingerprint(folder, sources, settings, fingerprint):
+    '''saves the fingerprint of a graph with the stamps of the input files it was made
+    from, replacing the one saved before the files changed'''
+    save_entry(folder, FINGERPRINT_PREFIX+graph_key(sources, settings), {'fingerprint':fingerprint, 'sources':file_stamps(sources)})
+    return None
+
+def invalidate(folder, sources):
+    '''removes the curves made from any of the input files if these
+    have changed since the curves were saved'''
+    stamps = file_stamps(sources)
+    stale = 0
+    for key in curve_keys(folder):
+        entry = load_entry(folder, key)
+        if entry is None:
+            continue #being saved by another run, or left by an older version of the store
+        for f,stamp in entry['sources'].iteritems():
+            if f in sources and stamps.get(f) != stamp:
+                remove_curves(folder, key)
+                stale += 1
+                break
+    return stale
+
+def remove_curves(folder, key):
+    '''removes the curves of a key and their entry, unless another run already did'''
+    for fileName in [key+'.npz', key+'.json']:
+        try:
+            os.remove(os.path.join(folder, fileName))
+        except OSError:
+            pass
+    return None
+
+def load_curves(folder, key):
+    '''returns the saved (lc_sizes, sc_sizes[, bands]) of a key or None. The
+    archive is touched to record its use.'''
+    if load_entry(folder, key) is None:
+        return None
+    curveFile = os.path.join(folder, key+'.npz')
+    try:
+        archive = np.load(curveFile)
+        curves = (archive['lc'].tolist(), archive['sc'].tolist())
+        if 'bands' in archive.files:
+            curves = curves + (tuple(archive['bands']),)
+        os.utime(curveFile, None)
+    except (IOError, OSError, ValueError):
+        return None #removed or evicted by another run
+    return curves
+
+def save_curves(folder, key, curves, sources, maxBytes=MAX_CACHE_BYTES):
+    '''saves the curves of a key along with the stamps of the input files
+    they were made from, then evicts old curves if the store is too big'''
+    make_folder(folder)
+    arrays = {'lc':np.array(curves[0]), 'sc':np.array(curves[1])}
+    if len(curves)>2:
+        arrays['bands'] = np.array(curves[2])
+    replace_file(os.path.join(folder, key+'.npz'), lambda f: np.savez(f, **arrays))
+    save_entry(folder, key, {'sources':file_stamps(sources)})
+    evict(folder, maxBytes)
+    return None
+
+def evict(folder, maxBytes):
+    '''removes least recently used curves until the store fits in maxBytes'''
+    used = []
+    for key in curve_keys(folder):
+        try:
+            stat = os.stat(os.path.join(folder, key+'.npz'))
+        except OSError:
+            continue
+        used.append((stat.st_mtime, stat.st_size, key))
+    total = sum(size for mtime,size,key in used)
+    for mtime,size,key in sorted(used):
+        if total <= maxBytes:
+            break
+        total -= size
+        remove_curves(folder, key)
+    return None
@@ -7,6 +7,7 @@ import numpy as np
 from tabulate import tabulate
 
 from network_simulation import get_network_fullnames
+from make_network import load_table
 
 BEGINNING = '''\\begin{table}
 \caption[]{}
@@ -22,7 +23,7 @@ def sample_sequence(net_path, networkNames, inputFolder, inputFileEnd):
 
 	otuTable = {}
 	for n in networks:
-		otuTable[n] = np.loadtxt(os.path.join(inputFolder,n.replace('BAC_','')+inputFileEnd), dtype='S1000')
+		otuTable[n] = load_table(os.path.join(inputFolder,n.replace('BAC_','')+inputFileEnd), dtype='S1000')
 
 	samples = []
 
@@ -50,7 +51,7 @@ def sample_sequence(net_path, networkNames, inputFolder, inputFileEnd):
 	return None
 
 def convert_file(fileName, header=False, rows=False):
-	table = np.loadtxt(fileName, delimiter='\t', dtype='S1000')
+	table = load_table(fileName, delimiter='\t', dtype='S1000')
 	convert(table,header,rows)
 	return None
 
@@ -0,0 +1,74 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Checks that exact betweenness found over a pool of processes is that of
+networkx to the last bit, and that the betweenness of a CompactGraph summed
+on its CSR arrays only differs from it by rounding.
+'''
+
+#library imports
+import sys
+import os
+import unittest
+import numpy as np
+import networkx as nx
+
+_cur_dir = os.path.dirname(os.path.realpath(__file__))
+_root_dir = os.path.dirname(_cur_dir)
+sys.path.insert(0, _root_dir)
+
+import betweenness
+import network_measures as nm
+from compact_graph import as_compact
+
+JOBS = 2
+
+
+def test_graphs():
+    '''small graphs of different shapes, with a self loop and an isolated node in the last one'''
+    graphs = [nx.gnm_random_graph(60, 150, seed=1),
+              nx.barabasi_albert_graph(80, 2, seed=2),
+              nx.path_graph(15)]
+    G = nx.relabel_nodes(nx.gnp_random_graph(40, 0.08, seed=3), lambda n: 'otu'+str(n))
+    G.add_edge('otu1', 'otu1')
+    G.add_node('isolated')
+    graphs.append(G)
+    return graphs
+
+
+class ParallelBetweennessTest(unittest.TestCase):
+
+    def setUp(self):
+        betweenness.set_accuracy()
+        betweenness.set_jobs(JOBS)
+
+    def tearDown(self):
+        betweenness.set_jobs(1)
+
+    def test_same_as_networkx(self):
+        for G in test_graphs():
+            for normalized in [True, False]:
+                expected = nx.betweenness_centrality(G, normalized=normalized)
+                self.assertEqual(betweenness.betweenness_centrality(G, normalized=normalized), expected)
+
+    def test_measurements(self):
+        for G in test_graphs():
+            expected = nx.betweenness_centrality(G)
+            self.assertEqual(nm.Measurements(G, JOBS).betweenness(), expected)
+            #a CompactGraph is measured on its networkx copy, whose neighbours are in CSR order
+            C = as_compact(G)
+            self.assertEqual(nm.Measurements(C, JOBS).betweenness(), nx.betweenness_centrality(C.to_networkx()))
+
+    def test_unordered_compact(self):
+        for G in test_graphs():
+            expected = nx.betweenness_centrality(G, normalized=False)
+            values = betweenness.betweenness_centrality(as_compact(G), normalized=False, ordered=False)
+            self.assertEqual(sorted(values), sorted(expected))
+            nodes = expected.keys()
+            np.testing.assert_allclose([values[n] for n in nodes], [expected[n] for n in nodes], rtol=1e-12, atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
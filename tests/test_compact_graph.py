@@ -0,0 +1,79 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Checks that a CompactGraph keeps the self loops of a network, so that the
+measures found on it, or on a graph store, are those found with networkx.
+'''
+
+#library imports
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+import networkx as nx
+
+_cur_dir = os.path.dirname(os.path.realpath(__file__))
+_root_dir = os.path.dirname(_cur_dir)
+sys.path.insert(0, _root_dir)
+
+import network_measures as nm
+import graph_store
+from make_network import import_columns, build_graph
+from compact_graph import as_compact
+
+MEASURES = [nm.number_of_edges, nm.average_degree, nm.connectance,
+            nm.degree_assortativity, nm.global_clustering_coefficient,
+            nm.number_of_edges_of_largest_connected_component]
+
+
+def loop_graph():
+    '''a small graph with self loops, one of them on a node without other edges'''
+    G = nx.relabel_nodes(nx.gnm_random_graph(30, 60, seed=4), lambda n: 'Otu'+str(n))
+    G.add_edges_from([('Otu1', 'Otu1'), ('Otu7', 'Otu7'), ('Otu99', 'Otu99')])
+    return G
+
+
+class SelfLoopTest(unittest.TestCase):
+
+    def test_conversion(self):
+        G = loop_graph()
+        C = as_compact(G)
+        self.assertEqual(C.number_of_selfloops(), 3)
+        self.assertEqual(sorted(C.to_networkx().edges()), sorted(G.edges()))
+        self.assertEqual(dict(zip(C.nodes, C.degrees(selfloops=True).tolist())), G.degree())
+        H = C.largest_component()
+        self.assertEqual(H.number_of_selfloops(), 2)
+        self.assertEqual(H.number_of_edges(), nm.get_LCC(G).number_of_edges())
+
+    def test_measures(self):
+        G = loop_graph()
+        for m in MEASURES:
+            self.assertEqual(m(as_compact(G)), m(G), m.__name__)
+        self.assertEqual(nm.node_degrees(as_compact(G)), G.degree())
+
+    def test_store(self):
+        folder = tempfile.mkdtemp()
+        try:
+            G = loop_graph()
+            nodeFile = os.path.join(folder, 'net_nodes.txt')
+            edgeFile = os.path.join(folder, 'net_edges.txt')
+            with open(nodeFile, 'w') as f:
+                f.write('name\n'+''.join([n+'\n' for n in G.nodes()]))
+            with open(edgeFile, 'w') as f:
+                f.write('source\ttarget\n'+''.join(['{0}\t{1}\n'.format(s,t) for s,t in G.edges()]))
+            #the networkx graph made from the same files, which leaves out nodes without edges
+            G = build_graph(*import_columns(nodeFile, edgeFile, 'both', True))
+            self.assertEqual(G.number_of_selfloops(), 3)
+            C = graph_store.open_graph(nodeFile, edgeFile, 'both', True)
+            self.assertEqual(sorted(C.to_networkx().edges()), sorted(G.edges()))
+            for m in MEASURES:
+                self.assertEqual(m(C), m(G), m.__name__)
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
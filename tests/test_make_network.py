@@ -0,0 +1,69 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Checks that the block reader of node and edge tables gives each column a
+type that fits all of its values, also when a value further down the file
+doesn't fit the type inferred from the first rows.
+'''
+
+#library imports
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+_cur_dir = os.path.dirname(os.path.realpath(__file__))
+_root_dir = os.path.dirname(_cur_dir)
+sys.path.insert(0, _root_dir)
+
+from make_network import read_table, get_nodes
+
+WIDE_INTEGER = '99999999999999999999' #too wide for a 64 bit integer
+
+
+class ReadTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_table(self, rows):
+        fileName = os.path.join(self.folder, 'table_nodes.txt')
+        with open(fileName, 'w') as f:
+            f.write('\n'.join(['\t'.join(r) for r in rows])+'\n')
+        return fileName
+
+    def test_types(self):
+        fileName = self.write_table([['name','count','weight','label'],
+                                     ['a','1','0.5','x'],
+                                     ['b','2','1','']])
+        header, columns = read_table(fileName, strings=1)
+        self.assertEqual(columns[0], ['a','b'])
+        self.assertEqual(columns[1].dtype, np.int64)
+        self.assertEqual(columns[2].tolist(), [0.5, 1.0])
+        self.assertEqual(columns[3], ['x',''])
+
+    def test_wide_integer(self):
+        fileName = self.write_table([['name','count'], ['a','1'], ['b',WIDE_INTEGER]])
+        nodes, properties = get_nodes(fileName)
+        self.assertEqual(nodes, ['a','b'])
+        self.assertEqual(properties['count'].dtype, np.float64)
+        self.assertEqual(properties['count'].tolist(), [1.0, float(WIDE_INTEGER)])
+
+    def test_wide_integer_past_sampled_rows(self):
+        rows = [['name','count']] + [['n'+str(i), str(i)] for i in range(50)] + [['last', WIDE_INTEGER]]
+        fileName = self.write_table(rows)
+        header, columns = read_table(fileName, strings=1, chunkBytes=64, sampleRows=5)
+        self.assertEqual(len(columns[1]), 51)
+        self.assertEqual(columns[1].dtype, np.float64)
+        self.assertEqual(columns[1][-1], float(WIDE_INTEGER))
+
+
+if __name__ == '__main__':
+    unittest.main()
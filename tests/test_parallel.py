@@ -0,0 +1,51 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Checks that the groups of tasks streamed over one pool of processes come
+back in order with the results of their own shared data, as they do when
+the tasks run one after the other.
+'''
+
+#library imports
+import sys
+import os
+import unittest
+
+_cur_dir = os.path.dirname(os.path.realpath(__file__))
+_root_dir = os.path.dirname(_cur_dir)
+sys.path.insert(0, _root_dir)
+
+import parallel
+
+JOBS = 3
+
+
+def scaled(shared, value):
+    return shared['factor']*value
+
+def groups(made):
+    '''groups of different sizes, one without tasks, recording when each one is taken'''
+    for k in range(7):
+        made.append(k)
+        yield k, scaled, {'factor':k}, [(v,) for v in range(k % 4)]
+
+
+class ImapGroupsTest(unittest.TestCase):
+
+    def test_same_as_serial(self):
+        expected = list(parallel.imap_groups(groups([]), 1))
+        self.assertEqual(expected[3], (3, [0, 3, 6]))
+        for window in [1, 2, 5]:
+            self.assertEqual(list(parallel.imap_groups(groups([]), JOBS, window)), expected)
+
+    def test_window(self):
+        made = []
+        for info, results in parallel.imap_groups(groups(made), JOBS, 2):
+            #the group given back and the two after it are the most taken from the stream
+            self.assertTrue(len(made) <= info+3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Checks the union-find attack curves against removing the nodes one by one
+and recomputing the components of the graph after each removal.
+'''
+
+#library imports
+import sys
+import os
+import unittest
+import numpy as np
+import networkx as nx
+
+_cur_dir = os.path.dirname(os.path.realpath(__file__))
+_root_dir = os.path.dirname(_cur_dir)
+sys.path.insert(0, _root_dir)
+
+import network_measures as nm
+from percolation import attack_curve
+
+
+def removal_loop_curve(G, order, fraction):
+    '''the attack as it was simulated before the percolation engine'''
+    lc_sizes = [1]
+    sc_sizes = [1]
+    startSize = len(nm.get_components(G)[0])
+    H = G.copy()
+    removal = int(G.number_of_nodes()*fraction)-1
+    for n in order[:removal]:
+        H.remove_node(n)
+        components = nm.get_components(H)
+        lc_sizes.append(len(components[0])/float(startSize))
+        if len(components)>1:
+            sc_sizes.append(np.mean([len(c) for c in components[1:]]))
+        else:
+            sc_sizes.append(1.0)
+    return lc_sizes, sc_sizes
+
+def test_graphs():
+    '''small graphs with several components, leaves, isolated nodes and a self loop'''
+    graphs = [nx.gnp_random_graph(40, 0.05, seed=1),
+              nx.barabasi_albert_graph(50, 2, seed=2),
+              nx.path_graph(12)]
+    G = nx.relabel_nodes(nx.gnp_random_graph(30, 0.08, seed=3), lambda n: 'OTU-{0}'.format(n))
+    G.add_edge('OTU-0', 'OTU-0')
+    G.add_node('OTU-isolated')
+    graphs.append(G)
+    return graphs
+
+
+class AttackCurveTest(unittest.TestCase):
+
+    def assert_same_curves(self, G, order, fraction):
+        lc, sc = attack_curve(G, order, fraction)
+        expectedLc, expectedSc = removal_loop_curve(G, order, fraction)
+        self.assertEqual(len(lc), len(expectedLc))
+        np.testing.assert_allclose(lc, expectedLc, rtol=1e-12)
+        np.testing.assert_allclose(sc, expectedSc, rtol=1e-12)
+
+    def test_random_orders(self):
+        rng = np.random.RandomState(0)
+        for G in test_graphs():
+            for replicate in range(3):
+                order = G.nodes()
+                rng.shuffle(order)
+                self.assert_same_curves(G, order, 1.0)
+
+    def test_targeted_order(self):
+        for G in test_graphs():
+            degrees = G.degree()
+            order = sorted(G.nodes(), key=lambda n: degrees[n], reverse=True)
+            self.assert_same_curves(G, order, 1.0)
+            self.assert_same_curves(G, order, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
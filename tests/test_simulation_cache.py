@@ -0,0 +1,79 @@
+'''
+created  10/18/2026
+
+by sperez
+
+Checks the store of simulation curves: curves are found again until their
+input files change, the least recently used ones are evicted first and
+entries that can't be read are treated as missing.
+'''
+
+#library imports
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+_cur_dir = os.path.dirname(os.path.realpath(__file__))
+_root_dir = os.path.dirname(_cur_dir)
+sys.path.insert(0, _root_dir)
+
+import simulation_cache
+
+CURVES = ([1.0, 0.5, 0.25], [1.0, 1.5, 1.0])
+
+
+class SimulationCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = os.path.join(self.folder, 'simulations')
+        self.source = os.path.join(self.folder, 'net_edges.txt')
+        with open(self.source, 'w') as f:
+            f.write('source\ttarget\na\tb\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_saved_curves_are_loaded(self):
+        self.assertEqual(simulation_cache.load_curves(self.store, 'key'), None)
+        simulation_cache.save_curves(self.store, 'key', CURVES, [self.source])
+        self.assertEqual(simulation_cache.load_curves(self.store, 'key'), CURVES)
+        self.assertEqual([f for f in os.listdir(self.store) if f.endswith('.tmp')], [])
+
+    def test_changed_sources_invalidate(self):
+        simulation_cache.save_curves(self.store, 'key', CURVES, [self.source])
+        simulation_cache.save_fingerprint(self.store, [self.source], ['both'], 'abc')
+        self.assertEqual(simulation_cache.invalidate(self.store, [self.source]), 0)
+        self.assertEqual(simulation_cache.load_fingerprint(self.store, [self.source], ['both']), 'abc')
+        with open(self.source, 'a') as f:
+            f.write('b\tc\n')
+        self.assertEqual(simulation_cache.invalidate(self.store, [self.source]), 1)
+        self.assertEqual(simulation_cache.load_curves(self.store, 'key'), None)
+        self.assertEqual(simulation_cache.load_fingerprint(self.store, [self.source], ['both']), None)
+
+    def test_least_recently_used_are_evicted(self):
+        simulation_cache.save_curves(self.store, 'old', CURVES, [self.source])
+        simulation_cache.save_curves(self.store, 'used', CURVES, [self.source])
+        past = time.time()-100
+        os.utime(os.path.join(self.store, 'old.npz'), (past, past))
+        os.utime(os.path.join(self.store, 'used.npz'), (past-10, past-10))
+        simulation_cache.load_curves(self.store, 'used')
+        size = os.path.getsize(os.path.join(self.store, 'used.npz'))
+        simulation_cache.save_curves(self.store, 'new', CURVES, [self.source], maxBytes=2*size)
+        self.assertEqual(sorted(simulation_cache.curve_keys(self.store)), ['new', 'used'])
+
+    def test_unreadable_entry_is_missing(self):
+        simulation_cache.save_curves(self.store, 'key', CURVES, [self.source])
+        with open(os.path.join(self.store, 'key.json'), 'w') as f:
+            f.write('{"sources": {}}{')
+        self.assertEqual(simulation_cache.load_curves(self.store, 'key'), None)
+        self.assertEqual(simulation_cache.invalidate(self.store, [self.source]), 0)
+        simulation_cache.save_curves(self.store, 'key', CURVES, [self.source])
+        self.assertEqual(simulation_cache.load_curves(self.store, 'key'), CURVES)
+
+
+if __name__ == '__main__':
+    unittest.main()